@@ -1,28 +1,42 @@
 import json
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.probability import FreqDist
 from loguru import logger
-import openai
 from typing import List, Dict
 import os
+import time
 
 # Assuming these are defined in your config file
 from utils.config import (
     KEYWORDS_PER_ARTICLE,
-    SUMMARY_LENGTH,
-    SUMMARIZED_ARTICLES_FILE,
     SCRAPED_DATA_FILE,
-    ALL_ARTICLES_FILE,
-    OPENAI_API_KEY
+    INCREMENTAL_ANALYSIS,
+    ENABLE_SUMMARY_CACHE,
+    BATCH_SIZE,
+    WORK_POLL_INTERVAL,
+    SUMMARIES_STORE_DIR,
+    EXPORT_JSONL,
+    ENABLE_SEARCH_INDEX,
+    ENABLE_TREND_DETECTION
 )
+from database.storage import ArticleStorage
+from database.search import SearchIndex
+from utils.jsonl_store import JsonlStore
+from utils.keywords import KeywordExtractor
+from utils.summary_cache import SummaryCache
+from utils.summarizers import SummarizationPipeline
+from utils.metrics import metrics
+from utils.trends import TrendTracker
+
 
 class EnhancedContentAnalysisAgent:
     def __init__(self):
-        self.stop_words = set(stopwords.words('english'))
         self.summarized_articles = []
-        openai.api_key = OPENAI_API_KEY
+        self.storage = ArticleStorage()
+        self.summary_store = JsonlStore(SUMMARIES_STORE_DIR) if EXPORT_JSONL else None
+        self.summary_cache = SummaryCache() if ENABLE_SUMMARY_CACHE else None
+        self.summarizer = SummarizationPipeline(cache=self.summary_cache)
+        self.keyword_extractor = KeywordExtractor()
+        self.search_index = SearchIndex() if ENABLE_SEARCH_INDEX else None
+        self.trends = TrendTracker(self.keyword_extractor) if ENABLE_TREND_DETECTION else None
 
     def initialize(self):
         logger.info("Initializing Enhanced Content Analysis Agent...")
@@ -30,16 +44,73 @@ class EnhancedContentAnalysisAgent:
 
     def run(self):
         logger.info("Starting content analysis...")
-        existing_articles = self.load_articles(ALL_ARTICLES_FILE)
-        newly_scraped_articles = self.load_articles(SCRAPED_DATA_FILE)
-
-        all_articles = existing_articles + newly_scraped_articles
+        self.import_scraped_articles()
+        if self.search_index is not None:
+            self.search_index.sync()
 
-        for article in all_articles:
-            self.process_article(article)
+        # Near-duplicates are excluded by the storage queries; they share the canonical article's analysis
+        if INCREMENTAL_ANALYSIS:
+            batches = self.storage.iter_unprocessed_batches(BATCH_SIZE)
+        else:
+            batches = self.storage.iter_article_batches(BATCH_SIZE)
+        processed_count = 0
+        for batch in batches:
+            processed_count += len(self.process_batch(batch))
+            self.save_summarized_articles()
 
-        self.save_summarized_articles()
-        logger.info(f"Completed content analysis for {len(all_articles)} articles.")
+        if not processed_count:
+            logger.warning("No articles were summarized in this run.")
+        self.save_state()
+        metrics.write_textfile()
+        logger.info(f"Completed content analysis for {processed_count} articles.")
+
+    def save_state(self):
+        """Persist the keyword corpus counts and apply the summary cache's expiry and size limits."""
+        self.keyword_extractor.corpus.save()
+        if self.summary_cache is not None:
+            self.summary_cache.evict()
+            self.summary_cache.log_stats()
+
+    def run_worker(self, work_queue, worker_id, stop_when_empty=False):
+        """Claim article batches from `work_queue` and analyse them until interrupted.
+
+        Several workers (processes or machines) can share one queue; a batch is acknowledged only
+        after its results are stored, so a worker that dies mid-batch leaves it to be re-claimed.
+        """
+        logger.info(f"Analysis worker {worker_id} started.")
+        processed_count = 0
+        try:
+            while True:
+                lease = work_queue.claim(worker_id, BATCH_SIZE)
+                if lease is None:
+                    if stop_when_empty:
+                        break
+                    time.sleep(WORK_POLL_INTERVAL)
+                    continue
+                try:
+                    results = self.process_batch(self.storage.get_articles(lease.article_ids))
+                except Exception as e:
+                    # Leave the lease to expire so a failing batch is retried later rather than in a tight loop
+                    logger.error(f"Worker {worker_id} failed on a batch of {len(lease.article_ids)} articles: {str(e)}")
+                    continue
+                except BaseException:
+                    work_queue.release(lease)
+                    raise
+                # Articles left unprocessed (e.g. failed summaries) keep their lease and are retried once it expires
+                done = [result['id'] for result in results]
+                if done:
+                    work_queue.ack(lease._replace(article_ids=done))
+                self.save_summarized_articles()
+                processed_count += len(results)
+        finally:
+            self.keyword_extractor.corpus.save()
+            logger.info(f"Analysis worker {worker_id} processed {processed_count} articles.")
+
+    def import_scraped_articles(self):
+        if os.path.exists(SCRAPED_DATA_FILE):
+            inserted = self.storage.insert_articles(self.load_articles(SCRAPED_DATA_FILE))
+            if inserted:
+                logger.info(f"Imported {inserted} scraped articles from {SCRAPED_DATA_FILE}")
 
     def load_articles(self, file_path: str) -> List[Dict]:
         try:
@@ -52,10 +123,60 @@ class EnhancedContentAnalysisAgent:
             logger.error(f"Error decoding JSON from file: {file_path}")
             return []
 
-    def process_article(self, article: Dict):
+    def process_batch(self, articles: List[Dict]) -> List[Dict]:
+        with metrics.span('analysis_batch'):
+            with metrics.span('summarization'):
+                summaries = self.summarizer.summarize_many(article.get('content') or '' for article in articles)
+            # Articles without a summary stay unprocessed, so they are analysed again once the backend recovers
+            failed = summaries.count(None)
+            if failed:
+                logger.warning(f"Summarization failed for {failed} of {len(articles)} articles; leaving them for a retry.")
+                articles = [article for article, summary in zip(articles, summaries) if summary is not None]
+                summaries = [summary for summary in summaries if summary is not None]
+            with metrics.span('keyword_extraction'):
+                # Only articles analysed for the first time count towards the corpus document frequencies
+                term_weights = self.keyword_extractor.score_batch(
+                    [article.get('content') or '' for article in articles],
+                    [not article.get('processed') for article in articles],
+                )
+                keywords = [self.keyword_extractor.top_terms(weights, KEYWORDS_PER_ARTICLE) for weights in term_weights]
+            first_result = len(self.summarized_articles)
+            for article, article_keywords, summary in zip(articles, keywords, summaries):
+                self.process_article(article, summary, article_keywords)
+            results = self.summarized_articles[first_result:]
+            first_time = self.storage.mark_processed(results)
+            if self.search_index is not None:
+                try:
+                    with metrics.span('search_indexing'):
+                        self.search_index.index_articles([result['id'] for result in results])
+                except Exception as e:
+                    # The results are already stored; SearchIndex.sync() picks up the missing articles later
+                    logger.error(f"Error indexing a batch of {len(results)} articles: {str(e)}")
+            if self.trends is not None:
+                self.update_trends(articles, term_weights, keywords, first_time)
+        metrics.inc('articles_analysed_total', len(results))
+        return results
+
+    def update_trends(self, articles, term_weights, keywords, first_time):
+        # Only articles processed for the first time by this batch: re-analysed articles (full runs,
+        # re-claimed leases) are already in the hourly counts and stories
+        first_time = set(first_time)
+        rows = [row for row in zip(articles, term_weights, keywords) if row[0].get('id') in first_time]
+        if not rows:
+            return
         try:
-            keywords = self.extract_keywords(article['content'])
-            summary = self.generate_summary(article['content'])
+            with metrics.span('trend_update'):
+                self.trends.add_batch(*map(list, zip(*rows)))
+        except Exception as e:
+            # Trends are derived data; a failure here must not fail the batch whose results are already stored
+            logger.error(f"Error updating trends for a batch of {len(rows)} articles: {str(e)}")
+
+    def process_article(self, article: Dict, summary: str = None, keywords: List[str] = None):
+        try:
+            if keywords is None:
+                keywords = self.extract_keywords(article['content'])
+            if summary is None:
+                summary = self.generate_summary(article['content'])
 
             self.summarized_articles.append({
                 "id": article['id'],
@@ -74,39 +195,21 @@ class EnhancedContentAnalysisAgent:
             logger.error(f"Error processing article {article.get('id', 'Unknown')}: {str(e)}")
 
     def extract_keywords(self, text: str) -> List[str]:
-        words = word_tokenize(text.lower())
-        words = [word for word in words if word.isalnum() and word not in self.stop_words]
-        freq_dist = FreqDist(words)
-        return [word for word, _ in freq_dist.most_common(KEYWORDS_PER_ARTICLE)]
+        return self.keyword_extractor.extract_batch([text], KEYWORDS_PER_ARTICLE)[0]
 
     def generate_summary(self, text: str) -> str:
-        try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that summarizes text."},
-                    {"role": "user", "content": f"Please summarize the following text in about {SUMMARY_LENGTH} characters:\n\n{text}"}
-                ],
-                max_tokens=SUMMARY_LENGTH // 4,  # Approximate token count
-                n=1,
-                stop=None,
-                temperature=0.7,
-            )
-            summary = response.choices[0].message['content'].strip()
-            return summary[:SUMMARY_LENGTH] + "..." if len(summary) > SUMMARY_LENGTH else summary
-        except Exception as e:
-            logger.error(f"Error generating summary using OpenAI: {str(e)}")
-            return "Summary generation failed."
+        return self.summarizer.summarize(text)
 
     def save_summarized_articles(self):
-        if self.summarized_articles:
-            with open(SUMMARIZED_ARTICLES_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.summarized_articles, f, indent=2, ensure_ascii=False)
-            logger.info(f"Saved {len(self.summarized_articles)} summarized articles to {SUMMARIZED_ARTICLES_FILE}")
-        else:
-            logger.warning("No articles were summarized in this run.")
+        """Export the pending results and clear them, so memory stays bounded by one batch."""
+        if self.summarized_articles and self.summary_store is not None:
+            count = self.summary_store.append(self.summarized_articles)
+            logger.info(f"Exported {count} summaries to {SUMMARIES_STORE_DIR}")
+        self.summarized_articles = []
 
     def cleanup(self):
+        if self.summary_cache is not None:
+            self.summary_cache.close()
         logger.info("Enhanced Content Analysis Agent cleanup completed.")
 
 def main():
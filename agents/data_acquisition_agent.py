@@ -1,116 +1,269 @@
-import feedparser
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
 from database.models import Session, Article
-from utils.config import NEWS_SOURCES, KEYWORD_RSS_FEEDS, ALL_ARTICLES_FILE
+from database.storage import ArticleStorage
+from utils.config import (
+    NEWS_SOURCES,
+    KEYWORD_RSS_FEEDS,
+    ARTICLES_STORE_DIR,
+    EXPORT_JSONL,
+    CONCURRENT_FETCH,
+    MAX_FETCH_WORKERS,
+    ENABLE_DEDUPLICATION,
+    ENABLE_BODY_ENRICHMENT,
+    STREAMING_MODE,
+    NEAR_DUPLICATE_WINDOW,
+)
+from utils.http_client import HttpFetcher
+from utils.html_extract import HtmlExtractor
+from utils.enrichment import BodyEnricher
+from utils.url_index import UrlIndex, DatabaseUrlIndex
+from utils.near_duplicates import NearDuplicateIndex
+from utils.jsonl_store import JsonlStore
+from utils.lazy import lazy_import, add_log_file
+from utils.metrics import metrics
 from loguru import logger
-import sys
 import time
 from sqlalchemy.exc import SQLAlchemyError
 from requests.exceptions import RequestException
-import json
-import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-logger.add(sys.stderr, format="{time} {level} {message}", filter="my_module", level="INFO")
-logger.add("data_acquisition.log", rotation="500 MB")
+feedparser = lazy_import('feedparser')
+
+def source_name(source):
+    return source.get('name', source.get('keyword', 'Unknown'))
 
 class DataAcquisitionAgent:
     def __init__(self):
+        add_log_file("data_acquisition.log", rotation="500 MB")
         self.session = Session()
-        self.all_articles = self.load_existing_articles()
-
-    def load_existing_articles(self):
-        if os.path.exists(ALL_ARTICLES_FILE):
-            try:
-                with open(ALL_ARTICLES_FILE, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                logger.error(f"Error decoding JSON from {ALL_ARTICLES_FILE}. Starting with empty list.")
-                return []
+        self.fetcher = HttpFetcher()
+        self.html_extractor = HtmlExtractor()
+        self.storage = ArticleStorage()
+        self.enricher = BodyEnricher(self.fetcher, self.storage) if ENABLE_BODY_ENRICHMENT else None
+        self.article_store = JsonlStore(ARTICLES_STORE_DIR) if EXPORT_JSONL else None
+        self.new_articles = []
+        if STREAMING_MODE:
+            # Nothing proportional to the archive is held in memory: URL lookups go to the database
+            # and near-duplicates are only tracked for the most recent articles
+            self.url_index = DatabaseUrlIndex.build(Session)
+            window_start = max(0, self.storage.max_id() - NEAR_DUPLICATE_WINDOW)
+            self.near_duplicates = NearDuplicateIndex.load_or_build(
+                self.storage.iter_articles(after_id=window_start), max_entries=NEAR_DUPLICATE_WINDOW
+            ) if ENABLE_DEDUPLICATION else None
         else:
-            logger.info(f"{ALL_ARTICLES_FILE} not found. Starting with empty list.")
-            return []
+            self.url_index = UrlIndex.build(self.session)
+            self.near_duplicates = (
+                NearDuplicateIndex.load_or_build(self.storage.iter_articles()) if ENABLE_DEDUPLICATION else None
+            )
+        self.near_duplicate_count = 0
+        self.article_listener = None  # Optional callable receiving each batch of newly saved article dicts
 
     def run(self):
         start_time = time.time()
+        if self.fetcher.cache is not None:
+            self.fetcher.cache.reset_stats()
+        self.near_duplicate_count = 0
         new_article_count = self.fetch_and_store_articles()
-        self.save_all_articles()
+        if self.enricher is not None:
+            self.enricher.enrich_pending()
+        self.save_state()
+        if self.near_duplicates is not None:
+            logger.info(f"Flagged {self.near_duplicate_count} new articles as near-duplicates.")
         end_time = time.time()
+        metrics.observe('acquisition_run_duration_seconds', end_time - start_time)
         logger.info(f"Run completed. Fetched {new_article_count} new articles in {end_time - start_time:.2f} seconds.")
+        if self.fetcher.cache is not None:
+            stats = self.fetcher.cache.stats
+            logger.info(f"Conditional fetch: skipped {stats['sources_skipped']} unchanged sources, "
+                        f"saved {stats['bytes_saved']} bytes and {stats['parse_time_avoided']:.2f}s of parsing.")
+        metrics.write_textfile()
+
+    def save_state(self):
+        """Persist what fetching accumulates in memory: the JSONL export queue, the near-duplicate
+        index and the HTTP validators. Callers storing articles from other threads must hold their lock."""
+        self.save_all_articles()
+        if self.near_duplicates is not None:
+            self.near_duplicates.save()
+        if self.fetcher.cache is not None:
+            self.fetcher.cache.save()
 
     def fetch_and_store_articles(self):
+        sources = NEWS_SOURCES + KEYWORD_RSS_FEEDS
+        if CONCURRENT_FETCH:
+            return self.fetch_concurrently(sources)
+
         new_article_count = 0
-        for source in NEWS_SOURCES + KEYWORD_RSS_FEEDS:
-            source_name = source.get('name', source.get('keyword', 'Unknown'))
-            logger.info(f"Fetching articles for {source_name}")
+        for source in sources:
+            logger.info(f"Fetching articles for {source_name(source)}")
             try:
-                if source.get('type') in ['rss', 'both'] or 'keyword' in source:
-                    new_article_count += self.fetch_from_rss(source)
-                if source.get('type') in ['web', 'both']:
-                    new_article_count += self.fetch_from_web(source)
-                time.sleep(2)  # Add a 2-second delay between requests
+                for kind, _ in self.source_targets(source):
+                    if kind == 'rss':
+                        new_article_count += self.fetch_from_rss(source)
+                    else:
+                        new_article_count += self.fetch_from_web(source)
             except Exception as e:
-                logger.error(f"Error fetching from {source_name}: {str(e)}")
+                logger.error(f"Error fetching from {source_name(source)}: {str(e)}")
         return new_article_count
 
+    def fetch_concurrently(self, sources):
+        """Download every feed and page in parallel; parse and store results as they arrive."""
+        new_article_count = 0
+        with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as executor:
+            futures = {}
+            for source in sources:
+                for kind, url in self.source_targets(source):
+                    futures[executor.submit(self.fetch, url, source)] = (kind, url, source)
+
+            for future in as_completed(futures):
+                kind, url, source = futures[future]
+                try:
+                    result = future.result()
+                except RequestException as e:
+                    logger.error(f"Network error fetching {url}: {str(e)}")
+                    continue
+                except Exception as e:
+                    # One bad source must not drop the results of the others
+                    logger.error(f"Error fetching {url}: {str(e)}")
+                    continue
+                if not result.changed:
+                    logger.info(f"{url} unchanged since last fetch, skipping parse")
+                    continue
+                try:
+                    if kind == 'rss':
+                        new_article_count += self.store_rss_entries(source, url, result.content)
+                    else:
+                        new_article_count += self.store_web_articles(source, url, result.content)
+                except Exception as e:
+                    logger.error(f"Error storing articles from {url}: {str(e)}")
+        return new_article_count
+
+    def source_targets(self, source):
+        targets = []
+        if source.get('type') in ['rss', 'both'] or 'keyword' in source:
+            targets.append(('rss', source.get('rss', source['url'])))
+        if source.get('type') in ['web', 'both']:
+            targets.append(('web', source['url']))
+        return targets
+
+    def fetch(self, url, source):
+        """Conditional GET of `url`, recording per-source latency, bytes and unchanged responses."""
+        with metrics.span('fetch', source=source_name(source)):
+            result = self.fetcher.fetch(url)
+        metrics.inc('fetch_bytes_total', len(result.content or b''), source=source_name(source))
+        if not result.changed:
+            metrics.inc('fetch_unchanged_total', source=source_name(source))
+        return result
+
     def fetch_from_rss(self, source):
-        count = 0
         feed_url = source.get('rss', source['url'])
         try:
-            feed = feedparser.parse(feed_url)
+            result = self.fetch(feed_url, source)
+        except RequestException as e:
+            logger.error(f"Network error fetching {feed_url}: {str(e)}")
+            return 0
+        if not result.changed:
+            logger.info(f"{feed_url} unchanged since last fetch, skipping parse")
+            return 0
+        return self.store_rss_entries(source, feed_url, result.content)
+
+    def store_rss_entries(self, source, feed_url, content):
+        count = 0
+        added = []
+        try:
+            parse_start = time.time()
+            with metrics.span('parse', source=source_name(source), kind='rss'):
+                feed = feedparser.parse(content)
+            self.record_parse_time(feed_url, time.time() - parse_start)
+            metrics.inc('entries_parsed_total', len(feed.entries), source=source_name(source))
             logger.info(f"Fetched {len(feed.entries)} entries from {feed_url}")
             for entry in feed.entries:
-                article = self.create_article_from_rss(entry, source.get('name', source.get('keyword', 'Unknown')))
-                if not self.article_exists(article.url):
-                    self.session.add(article)
-                    self.all_articles.append(self.article_to_dict(article))
-                    count += 1
-            self.session.commit()
+                article = self.create_article_from_rss(entry, source_name(source))
+                if self.add_article(article):
+                    added.append(article)
+            count = self.save_articles(added)
+            metrics.inc('articles_new_total', count, source=source_name(source))
         except Exception as e:
             logger.error(f"Error processing RSS feed {feed_url}: {str(e)}")
-            self.session.rollback()
+            self.discard_articles(added)
+            self.invalidate_cached_source(feed_url)
         logger.info(f"Added {count} new articles from {feed_url}")
         return count
 
     def fetch_from_web(self, source):
+        try:
+            result = self.fetch(source['url'], source)
+        except RequestException as e:
+            logger.error(f"Network error fetching {source['url']}: {str(e)}")
+            return 0
+        if not result.changed:
+            logger.info(f"{source['url']} unchanged since last fetch, skipping parse")
+            return 0
+        return self.store_web_articles(source, source['url'], result.content)
+
+    def store_web_articles(self, source, page_url, content):
         count = 0
+        added = []
         try:
-            response = requests.get(source['url'], timeout=10, headers={'User-Agent': 'Mozilla/5.0'})
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            articles = self.extract_articles_from_soup(soup, source)
-            logger.info(f"Extracted {len(articles)} articles from {source['url']}")
+            parse_start = time.time()
+            with metrics.span('parse', source=source_name(source), kind='web'):
+                articles = self.html_extractor.extract(content, source)
+            self.record_parse_time(page_url, time.time() - parse_start)
+            metrics.inc('entries_parsed_total', len(articles), source=source_name(source))
+            logger.info(f"Extracted {len(articles)} articles from {page_url}")
             for article_data in articles:
                 article = self.create_article_from_web(article_data, source['name'])
-                if not self.article_exists(article.url):
-                    self.session.add(article)
-                    self.all_articles.append(self.article_to_dict(article))
-                    count += 1
-            self.session.commit()
-        except RequestException as e:
-            logger.error(f"Network error fetching {source['url']}: {str(e)}")
+                if self.add_article(article):
+                    added.append(article)
+            count = self.save_articles(added)
+            metrics.inc('articles_new_total', count, source=source_name(source))
         except Exception as e:
-            logger.error(f"Error processing web source {source['url']}: {str(e)}")
-            self.session.rollback()
-        logger.info(f"Added {count} new articles from {source['url']}")
+            logger.error(f"Error processing web source {page_url}: {str(e)}")
+            self.discard_articles(added)
+            self.invalidate_cached_source(page_url)
+        logger.info(f"Added {count} new articles from {page_url}")
         return count
 
-    def extract_articles_from_soup(self, soup, source):
-        articles = []
-        for article in soup.find_all(['article', 'div', 'li'], class_=['post', 'article', 'news-item']):
-            title_tag = article.find(['h2', 'h3', 'h4', 'a'], class_=['title', 'headline'])
-            link_tag = article.find('a', href=True)
-            if title_tag and link_tag:
-                articles.append({
-                    'title': title_tag.text.strip(),
-                    'url': link_tag['href'] if link_tag['href'].startswith('http') else source['url'] + link_tag['href'],
-                    'summary': article.find('p', class_=['summary', 'excerpt']).text.strip() if article.find('p', class_=['summary', 'excerpt']) else ''
-                })
-        return articles
+    def record_parse_time(self, url, seconds):
+        if self.fetcher.cache is not None:
+            self.fetcher.cache.record_parse_time(url, seconds)
+
+    def invalidate_cached_source(self, url):
+        # Forget the validators so a failed parse is retried on the next run instead of skipped
+        if self.fetcher.cache is not None:
+            self.fetcher.cache.invalidate(url)
 
     def article_exists(self, url):
-        return any(article['url'] == url for article in self.all_articles)
+        return url in self.url_index
+
+    def add_article(self, article):
+        if not self.url_index.add(article.url):
+            metrics.inc('dedup_hits_total', kind='url')
+            return False
+        if self.near_duplicates is not None:
+            article.duplicate_of = self.near_duplicates.check_and_add(article.url, f"{article.title} {article.content or ''}")
+            if article.duplicate_of:
+                self.near_duplicate_count += 1
+                metrics.inc('dedup_hits_total', kind='near_duplicate')
+                logger.info(f"{article.url} is a near-duplicate of {article.duplicate_of}")
+        return True
+
+    def save_articles(self, articles):
+        """Bulk insert `articles` into the database and queue them for the optional JSONL export."""
+        if not articles:
+            return 0
+        records = [self.article_to_dict(article) for article in articles]
+        inserted = self.storage.insert_articles(records)
+        self.url_index.mark_stored(record['url'] for record in records)
+        if self.article_store is not None:
+            self.new_articles.extend(records)
+        if self.article_listener is not None:
+            self.article_listener(records)
+        return inserted
+
+    def discard_articles(self, articles):
+        # Articles that failed to save must not block a retry on the next run
+        for article in articles:
+            self.url_index.discard(article.url)
 
     def create_article_from_rss(self, entry, source_name):
         return Article(
@@ -146,15 +299,21 @@ class DataAcquisitionAgent:
             'url': article.url,
             'source': article.source,
             'published_date': article.published_date.isoformat(),
-            'content': article.content
+            'content': article.content,
+            'duplicate_of': article.duplicate_of
         }
 
     def save_all_articles(self):
-        with open(ALL_ARTICLES_FILE, 'w') as f:
-            json.dump(self.all_articles, f, indent=2)
-        logger.info(f"Saved {len(self.all_articles)} articles to {ALL_ARTICLES_FILE}")
+        if self.article_store is None:
+            return
+        count = self.article_store.append(self.new_articles)
+        self.new_articles = []
+        logger.info(f"Exported {count} new articles to {ARTICLES_STORE_DIR}")
 
     def cleanup(self):
+        if self.enricher is not None:
+            self.enricher.close()
+        self.fetcher.close()
         self.session.close()
 
     def initialize(self):
@@ -0,0 +1,322 @@
+import heapq
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+from requests.exceptions import RequestException
+
+from agents.data_acquisition_agent import DataAcquisitionAgent
+from agents.content_analysis_agent import EnhancedContentAnalysisAgent
+from agents.reporting_agent import EnhancedReportingAgent
+from utils.metrics import metrics
+from utils.config import (
+    NEWS_SOURCES,
+    KEYWORD_RSS_FEEDS,
+    NORMAL_INTERVAL,
+    RETRY_INTERVAL,
+    MAX_FETCH_WORKERS,
+    BATCH_SIZE,
+    ENRICH_BATCH_SIZE,
+    SOURCE_MIN_INTERVAL,
+    SOURCE_MAX_INTERVAL,
+    PIPELINE_QUEUE_SIZE,
+    REPORT_FLUSH_INTERVAL,
+)
+
+STOP = object()
+
+
+class SourceSchedule:
+    """Polling state for one feed or page. The interval shrinks while the source keeps
+    producing new articles and grows while it does not."""
+
+    def __init__(self, kind, url, source, interval=NORMAL_INTERVAL):
+        self.kind = kind
+        self.url = url
+        self.source = source
+        self.interval = interval
+        self.next_poll = time.monotonic()
+
+    def __lt__(self, other):
+        return self.next_poll < other.next_poll
+
+    def record_result(self, new_articles):
+        if new_articles:
+            self.interval = max(SOURCE_MIN_INTERVAL, self.interval / 2)
+        else:
+            self.interval = min(SOURCE_MAX_INTERVAL, self.interval * 1.5)
+        self.next_poll = time.monotonic() + self.interval
+
+    def record_error(self):
+        self.next_poll = time.monotonic() + RETRY_INTERVAL
+
+
+class PipelineScheduler:
+    """Runs acquisition, analysis and reporting as concurrent stages connected by bounded queues.
+
+    Articles flow to analysis as soon as their feed is stored, and reports are written shortly
+    after analysis results arrive. A full queue blocks the stage feeding it (backpressure).
+    """
+
+    def __init__(self, acquisition=None, analysis=None, reporting=None):
+        self.acquisition = acquisition or DataAcquisitionAgent()
+        self.analysis = analysis or EnhancedContentAnalysisAgent()
+        self.reporting = reporting or EnhancedReportingAgent()
+        self.analysis_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        # With body enrichment on, new articles pass through it before reaching analysis
+        self.enrich_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE) if self.acquisition.enricher else None
+        self.report_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        self.stop_event = threading.Event()
+        self.store_lock = threading.Lock()
+        self.schedules = [
+            SourceSchedule(kind, url, source)
+            for source in NEWS_SOURCES + KEYWORD_RSS_FEEDS
+            for kind, url in self.acquisition.source_targets(source)
+        ]
+        self.threads = []
+        self.backlog_max_id = 0
+        self.failed_articles = deque()  # Articles whose analysis failed, put back on the analysis queue later
+        self.retry_at = None
+        self.maintained_at = time.monotonic()
+        self.acquisition.article_listener = self.enqueue_articles
+
+    def start(self):
+        self.acquisition.initialize()
+        self.analysis.initialize()
+        self.reporting.initialize()
+        self.backlog_max_id = self.analysis.storage.max_id()
+        for target, name in [
+            (self.enqueue_backlog, 'backlog'),
+            (self.acquisition_stage, 'acquisition'),
+            (self.enrichment_stage, 'enrichment'),
+            (self.analysis_stage, 'analysis'),
+            (self.reporting_stage, 'reporting'),
+        ]:
+            thread = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        logger.info(f"Pipeline started with {len(self.schedules)} sources.")
+
+    def run_forever(self):
+        self.start()
+        try:
+            while not self.stop_event.is_set():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            logger.info("Pipeline stopped by user.")
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.stop_event.set()
+        self._put(self.enrich_queue or self.analysis_queue, STOP, force=True)
+        for thread in self.threads:
+            thread.join(timeout=30)
+        self.maintain()
+        self.acquisition.cleanup()
+        self.analysis.cleanup()
+        self.reporting.cleanup()
+
+    def _put(self, target_queue, item, force=False):
+        """Blocking put that gives up when the pipeline is stopping (unless `force`)."""
+        while True:
+            try:
+                target_queue.put(item, timeout=1)
+                return True
+            except queue.Full:
+                if self.stop_event.is_set() and not force:
+                    return False
+
+    def enqueue_articles(self, articles):
+        for article in articles:
+            if not article.get('duplicate_of') and article.get('id') is not None:
+                if not self._put(self.enrich_queue or self.analysis_queue, article):
+                    return
+
+    def enqueue_backlog(self):
+        # Articles stored before this process started but never analysed; newer ones arrive
+        # through `enqueue_articles`, so stop at the last id present at startup.
+        for batch in self.analysis.storage.iter_unprocessed_batches(BATCH_SIZE):
+            for article in batch:
+                if article['id'] > self.backlog_max_id:
+                    return
+                if not self._put(self.analysis_queue, article):
+                    return
+
+    def acquisition_stage(self):
+        # Schedules sit in the heap while waiting and come back through `polled` once fetched,
+        # so a slow source is never polled twice at the same time.
+        heap = list(self.schedules)
+        heapq.heapify(heap)
+        polled = queue.Queue()
+        with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as executor:
+            while not self.stop_event.is_set():
+                while True:
+                    try:
+                        heapq.heappush(heap, polled.get_nowait())
+                    except queue.Empty:
+                        break
+                if not heap or heap[0].next_poll > time.monotonic():
+                    delay = heap[0].next_poll - time.monotonic() if heap else 1.0
+                    self.stop_event.wait(min(max(delay, 0.05), 1.0))
+                    continue
+                schedule = heapq.heappop(heap)
+                executor.submit(self.poll_source, schedule).add_done_callback(
+                    lambda future, s=schedule: self._polled(future, s, polled)
+                )
+
+    def _polled(self, future, schedule, polled):
+        # A schedule must never come back with its old next_poll, or the source is polled in a tight loop
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Error polling {schedule.url}: {str(error)}")
+            schedule.record_error()
+        polled.put(schedule)
+
+    def poll_source(self, schedule):
+        try:
+            result = self.acquisition.fetch(schedule.url, schedule.source)
+        except RequestException as e:
+            logger.error(f"Network error fetching {schedule.url}: {str(e)}")
+            schedule.record_error()
+            return
+        except Exception as e:
+            logger.error(f"Error fetching {schedule.url}: {str(e)}")
+            schedule.record_error()
+            return
+        if not result.changed:
+            schedule.record_result(0)
+            return
+        try:
+            with self.store_lock:
+                if schedule.kind == 'rss':
+                    count = self.acquisition.store_rss_entries(schedule.source, schedule.url, result.content)
+                else:
+                    count = self.acquisition.store_web_articles(schedule.source, schedule.url, result.content)
+        except Exception as e:
+            logger.error(f"Error storing articles from {schedule.url}: {str(e)}")
+            schedule.record_error()
+            return
+        schedule.record_result(count)
+        logger.info(f"Next poll of {schedule.url} in {schedule.interval:.0f}s")
+
+    def enrichment_stage(self):
+        if self.enrich_queue is None:
+            return
+        while True:
+            batch = self._take_batch(self.enrich_queue, ENRICH_BATCH_SIZE)
+            if batch is None:
+                self._put(self.analysis_queue, STOP, force=True)
+                return
+            if not batch:
+                continue
+            try:
+                self.acquisition.enricher.enrich(batch)
+            except Exception as e:
+                # Articles still go on to analysis with their excerpts
+                logger.error(f"Error enriching batch of {len(batch)} articles: {str(e)}")
+            for article in batch:
+                self._put(self.analysis_queue, article, force=True)
+
+    def analysis_stage(self):
+        while True:
+            self.retry_failed_articles()
+            batch = self._take_batch(self.analysis_queue, BATCH_SIZE)
+            if batch is None:
+                self._put(self.report_queue, STOP, force=True)
+                return
+            if not batch:
+                continue
+            try:
+                results = self.analysis.process_batch(batch)
+                self.analysis.save_summarized_articles()
+                self._put(self.report_queue, len(results), force=True)
+            except Exception as e:
+                logger.error(f"Error analysing batch of {len(batch)} articles: {str(e)}")
+                results = []
+            analysed = {result['id'] for result in results}
+            self.record_failed_articles([article for article in batch if article['id'] not in analysed])
+
+    def record_failed_articles(self, articles):
+        # Unprocessed articles are otherwise only picked up again by the backlog scan at the next start
+        if articles and not self.failed_articles:
+            self.retry_at = time.monotonic() + RETRY_INTERVAL
+        self.failed_articles.extend(articles)
+
+    def retry_failed_articles(self):
+        if not self.failed_articles or time.monotonic() < self.retry_at:
+            return
+        logger.info(f"Retrying analysis of {len(self.failed_articles)} articles")
+        while self.failed_articles:
+            try:
+                # Never block: this thread is the analysis queue's only consumer
+                self.analysis_queue.put_nowait(self.failed_articles[0])
+            except queue.Full:
+                break
+            self.failed_articles.popleft()
+
+    def _take_batch(self, source_queue, size):
+        """Wait for one item, then drain up to `size` without blocking. Returns None on STOP."""
+        try:
+            first = source_queue.get(timeout=1)
+        except queue.Empty:
+            return []
+        if first is STOP:
+            return None
+        batch = [first]
+        while len(batch) < size:
+            try:
+                item = source_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is STOP:
+                self._put(source_queue, STOP, force=True)
+                break
+            batch.append(item)
+        return batch
+
+    def reporting_stage(self):
+        pending = 0
+        first_pending_at = None
+        while True:
+            try:
+                item = self.report_queue.get(timeout=1)
+            except queue.Empty:
+                item = None
+            if item is STOP:
+                if pending:
+                    self.reporting.run()
+                return
+            if item:
+                pending += item
+                first_pending_at = first_pending_at or time.monotonic()
+            # Coalesce results for a short while so bursts produce one report, not dozens
+            if pending and time.monotonic() - first_pending_at >= REPORT_FLUSH_INTERVAL:
+                try:
+                    self.reporting.run()
+                except Exception as e:
+                    logger.error(f"Error generating report: {str(e)}")
+                pending = 0
+                first_pending_at = None
+                self.maintain()
+            elif time.monotonic() - self.maintained_at >= NORMAL_INTERVAL:
+                # Acquisition keeps adding to the in-memory state even while nothing is analysed
+                self.maintain()
+
+    def maintain(self):
+        """The per-run upkeep of the batch agents: save the near-duplicate index, HTTP validators and
+        keyword corpus, export pending JSONL records, evict from the summary cache and index any
+        processed articles the search index is missing."""
+        self.maintained_at = time.monotonic()
+        try:
+            with self.store_lock:
+                self.acquisition.save_state()
+            self.analysis.save_state()
+            if self.analysis.search_index is not None:
+                self.analysis.search_index.sync()
+            metrics.write_textfile()
+        except Exception as e:
+            logger.error(f"Error saving pipeline state: {str(e)}")
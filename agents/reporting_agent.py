@@ -1,45 +1,167 @@
-import json
+import glob
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from loguru import logger
-from utils.config import REPORT_OUTPUT_DIR, SUMMARIZED_ARTICLES_FILE
+from utils.config import REPORT_OUTPUT_DIR, REPORT_MODE, REPORT_DIGESTS, DIGEST_GRACE_PERIOD, STREAMING_MODE, ENABLE_TREND_DETECTION
+from database.storage import ArticleStorage
+from utils.lazy import add_log_file
+from utils.metrics import metrics
+from utils.output_formats import StreamedArray, get_output_format, is_output_file
+from utils.trends import trending_section
 
-logger.add("reporting.log", rotation="500 MB")
+DIGEST_PERIODS = {
+    'hourly': timedelta(hours=1),
+    'daily': timedelta(days=1),
+}
 
 class EnhancedReportingAgent:
     def __init__(self):
+        add_log_file("reporting.log", rotation="500 MB")
         self.last_report_time = self.get_last_report_time()
+        self.last_report_sequence = self.get_last_report_sequence()
+        self.storage = ArticleStorage()
+        self.output_format = get_output_format()
 
     def run(self):
         logger.info("Starting report generation...")
-        self.generate_new_articles_report()
+        with metrics.span('report_build', report='articles_report'):
+            if REPORT_MODE == 'incremental':
+                self.generate_incremental_report()
+            else:
+                self.generate_new_articles_report()
+        for period in REPORT_DIGESTS:
+            with metrics.span('report_build', report=f"{period}_digest"):
+                self.generate_digest(period)
+        metrics.write_textfile()
         logger.info("Report generation completed.")
 
+    def generate_incremental_report(self):
+        """Report only articles processed since the last report; older ones are referenced, not copied.
+
+        New articles are selected by processed_seq rather than processed_at: a batch committed while
+        this report is built gets a higher sequence number and goes into the next report.
+        """
+        report_time = datetime.now()
+        window_start = self.last_report_time
+        last_sequence = self.storage.max_processed_seq()
+        new_count, new_articles = self.window_articles('processed_seq', self.last_report_sequence + 1, last_sequence + 1)
+        total_articles = self.storage.count(processed=True)
+
+        report = {
+            "report_time": report_time.isoformat(),
+            "window_start": window_start.isoformat(),
+            "total_articles": total_articles,
+            "new_articles_count": new_count,
+            "new_articles": new_articles,
+            "old_articles": {
+                "count": total_articles - new_count,
+                "processed_before": window_start.isoformat(),
+                "previous_report": self.get_previous_report("articles_report"),
+            }
+        }
+        self.add_trending_section(report, report_time)
+
+        self.save_report(report, "articles_report")
+        self.update_last_report_time(report_time)
+        self.update_last_report_sequence(last_sequence)
+
+    def generate_digest(self, period):
+        """Write a digest of articles analysed in the last complete hour/day, once per window.
+
+        Windows are on processed_at, not published_date, so articles fetched or analysed long after
+        publication still appear in exactly one digest. A window is only written DIGEST_GRACE_PERIOD
+        after it closes, once batches stamped just before its end are committed. Windows with no
+        articles get no file, and windows that closed while the process was down are not backfilled.
+        """
+        length = DIGEST_PERIODS[period]
+        now = datetime.now()
+        closed = now - timedelta(seconds=DIGEST_GRACE_PERIOD)
+        if period == 'hourly':
+            window_end = closed.replace(minute=0, second=0, microsecond=0)
+        else:
+            window_end = closed.replace(hour=0, minute=0, second=0, microsecond=0)
+        window_start = window_end - length
+
+        name = f"{period}_digest_{window_start.strftime('%Y%m%d_%H%M')}"
+        # Written in any format, e.g. before REPORT_FORMAT was changed
+        if glob.glob(os.path.join(REPORT_OUTPUT_DIR, f"{name}.*")):
+            return
+
+        if not self.storage.count_window('processed_at', window_start, window_end):
+            return
+        articles_count, articles = self.window_articles('processed_at', window_start, window_end)
+        digest = {
+            "report_time": now.isoformat(),
+            "period": period,
+            "window_start": window_start.isoformat(),
+            "window_end": window_end.isoformat(),
+            "articles_count": articles_count,
+            "articles": articles,
+        }
+        self.save_report(digest, f"{period}_digest", name)
+
+    def get_previous_report(self, report_type):
+        # Timestamped filenames sort chronologically
+        reports = sorted(path for path in glob.glob(os.path.join(REPORT_OUTPUT_DIR, f"{report_type}_*")) if is_output_file(path))
+        return os.path.basename(reports[-1]) if reports else None
+
+    def window_articles(self, column_name, start, end):
+        """Return (count, formatted articles) for a processed_at/published_date window.
+
+        In streaming mode the articles are read from the database while the report is written.
+        """
+        articles = self.storage.iter_window(column_name, start, end)
+        if STREAMING_MODE:
+            return self.storage.count_window(column_name, start, end), StreamedArray(map(self.format_article, articles))
+        articles = self.format_articles(articles)
+        return len(articles), articles
+
     def generate_new_articles_report(self):
-        all_articles = self.get_all_articles()
-        new_articles, old_articles = self.separate_new_and_old_articles(all_articles)
+        if STREAMING_MODE:
+            return self.generate_streamed_articles_report()
+        new_articles, old_articles = self.separate_new_and_old_articles(self.get_all_articles())
 
         report = {
             "report_time": datetime.now().isoformat(),
-            "total_articles": len(all_articles),
+            "total_articles": len(new_articles) + len(old_articles),
             "new_articles_count": len(new_articles),
             "new_articles": self.format_articles(new_articles),
             "old_articles": self.format_articles(old_articles)
         }
+        self.add_trending_section(report)
 
         self.save_report(report, "articles_report")
         self.update_last_report_time()
 
+    def generate_streamed_articles_report(self):
+        """generate_new_articles_report without holding the archive in memory: new and old articles
+        are two index range scans on published_date, written to the report as they are read."""
+        report_time = datetime.now()
+        new_count, new_articles = self.window_articles('published_date', self.last_report_time, datetime.max)
+        old_count, old_articles = self.window_articles('published_date', datetime.min, self.last_report_time)
+
+        report = {
+            "report_time": report_time.isoformat(),
+            "total_articles": new_count + old_count,
+            "new_articles_count": new_count,
+            "new_articles": new_articles,
+            "old_articles": old_articles
+        }
+        self.add_trending_section(report, report_time)
+
+        self.save_report(report, "articles_report")
+        self.update_last_report_time(report_time)
+
+    def add_trending_section(self, report, now=None):
+        """Add spiking keywords, topic activity and the largest recent stories from the trend tables."""
+        if not ENABLE_TREND_DETECTION:
+            return
+        with metrics.span('report_build', report='trending'):
+            report["trending"] = trending_section(now=now)
+
     def get_all_articles(self):
-        try:
-            with open(SUMMARIZED_ARTICLES_FILE, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            logger.error(f"Summarized articles file not found: {SUMMARIZED_ARTICLES_FILE}")
-            return []
-        except json.JSONDecodeError:
-            logger.error(f"Error decoding JSON from file: {SUMMARIZED_ARTICLES_FILE}")
-            return []
+        """Stream every processed article from the database."""
+        return self.storage.iter_articles(processed=True)
 
     def separate_new_and_old_articles(self, articles):
         new_articles = []
@@ -51,29 +173,36 @@ class EnhancedReportingAgent:
                 old_articles.append(article)
         return new_articles, old_articles
 
+    def format_article(self, article):
+        return {
+            "id": article.get('id'),
+            "title": article['title'],
+            "url": article['url'],
+            "source": article['source'],
+            "published_date": article['published_date'],
+            "summary": article['summary'],
+            "keywords": article['keywords']
+        }
+
     def format_articles(self, articles):
-        return [
-            {
-                "title": article['title'],
-                "url": article['url'],
-                "source": article['source'],
-                "published_date": article['published_date'],
-                "summary": article['summary'],
-                "keywords": article['keywords']
-            }
-            for article in articles
-        ]
+        return [self.format_article(article) for article in articles]
 
-    def save_report(self, report, report_type):
+    def save_report(self, report, report_type, name=None):
         if not os.path.exists(REPORT_OUTPUT_DIR):
             os.makedirs(REPORT_OUTPUT_DIR)
 
-        filename = f"{report_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        filepath = os.path.join(REPORT_OUTPUT_DIR, filename)
+        name = name or f"{report_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        extension = self.output_format.extension
+        filepath = os.path.join(REPORT_OUTPUT_DIR, name + extension)
+        suffix = 1
+        while os.path.exists(filepath):
+            # Two reports in the same second must not overwrite each other
+            filepath = os.path.join(REPORT_OUTPUT_DIR, f"{name}_{suffix}{extension}")
+            suffix += 1
 
         try:
-            with open(filepath, 'w') as f:
-                json.dump(report, f, indent=2)
+            self.output_format.write(filepath, report)
+            metrics.inc('reports_written_total', report=report_type)
             logger.info(f"Saved {report_type} to {filepath}")
         except IOError as e:
             logger.error(f"Error saving report to {filepath}: {str(e)}")
@@ -90,14 +219,36 @@ class EnhancedReportingAgent:
             logger.error("Error parsing last report time. Using minimum datetime.")
             return datetime.min
 
-    def update_last_report_time(self):
+    def update_last_report_time(self, report_time=None):
+        self.last_report_time = report_time or datetime.now()
         last_report_file = os.path.join(REPORT_OUTPUT_DIR, 'last_report_time.txt')
         try:
             with open(last_report_file, 'w') as f:
-                f.write(datetime.now().isoformat())
+                f.write(self.last_report_time.isoformat())
         except IOError as e:
             logger.error(f"Error updating last report time: {str(e)}")
 
+    def get_last_report_sequence(self):
+        last_sequence_file = os.path.join(REPORT_OUTPUT_DIR, 'last_report_sequence.txt')
+        try:
+            with open(last_sequence_file, 'r') as f:
+                return int(f.read().strip())
+        except FileNotFoundError:
+            # No report selected by sequence yet: articles processed before processed_seq existed (0) are new too
+            return -1
+        except ValueError:
+            logger.error("Error parsing last report sequence. Reporting every processed article.")
+            return -1
+
+    def update_last_report_sequence(self, sequence):
+        self.last_report_sequence = sequence
+        last_sequence_file = os.path.join(REPORT_OUTPUT_DIR, 'last_report_sequence.txt')
+        try:
+            with open(last_sequence_file, 'w') as f:
+                f.write(str(sequence))
+        except IOError as e:
+            logger.error(f"Error updating last report sequence: {str(e)}")
+
     def initialize(self):
         if not os.path.exists(REPORT_OUTPUT_DIR):
             os.makedirs(REPORT_OUTPUT_DIR)
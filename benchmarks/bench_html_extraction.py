@@ -0,0 +1,52 @@
+"""Compare listing-page extraction engines on the saved HTML fixtures.
+
+    python -m benchmarks.bench_html_extraction [repeats]
+"""
+import os
+import sys
+import time
+
+from utils.html_extract import HtmlExtractor, extract_with_soup, item_strainer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+FIXTURES = [
+    ('generic_homepage.html', {"name": "Generic", "url": "https://example.com"}),
+    ('press_release_list.html', {
+        "name": "Press releases",
+        "url": "https://press.example.com",
+        "selectors": {"item": "//ul[@class='news-list']/li[h3]", "title": ".//h3", "summary": ".//p[@class='teaser']"},
+    }),
+]
+
+
+def time_engine(extract, content, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        articles = extract(content)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return articles, timings[len(timings) // 2]
+
+
+def main(repeats=20):
+    extractor = HtmlExtractor()
+    for filename, source in FIXTURES:
+        with open(os.path.join(FIXTURES_DIR, filename), 'rb') as f:
+            content = f.read()
+        engines = [
+            ('html.parser (previous)', lambda c: extract_with_soup(c, source)),
+            ('SoupStrainer', lambda c: extract_with_soup(c, source, item_strainer())),
+            ('lxml + XPath', lambda c: extractor.extract_with_lxml(c, source)),
+        ]
+        print(f"{filename} ({len(content) / 1024:.0f} KB, median of {repeats} runs)")
+        baseline = None
+        for name, extract in engines:
+            articles, median = time_engine(extract, content, repeats)
+            baseline = baseline or median
+            print(f"  {name:<24} {median * 1000:8.2f} ms  {baseline / median:5.1f}x  {len(articles)} articles")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,110 @@
+"""Disk usage, write time and downstream load time of the report/archive output formats.
+
+    python -m benchmarks.bench_output_formats --articles 100000
+
+A full articles report (summaries and keywords) and an archive (also article content) of the
+given size are written in each available format. Each file is then read back whole, with a
+projection (title, url, published_date), with a predicate (one source, last day of 30) and with
+both, as a downstream consumer would.
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.memory_profile import vocabulary
+from utils.output_formats import OUTPUT_FORMATS, JsonFormat
+
+PROJECTION = ['title', 'url', 'published_date']
+SOURCES = [f"Source {i}" for i in range(20)]
+
+
+def build_articles(size, with_content):
+    words = vocabulary()
+    rng = random.Random(1)
+    start = datetime.now() - timedelta(days=30)
+    articles = []
+    for i in range(size):
+        article = {
+            'id': i + 1,
+            'title': ' '.join(rng.choices(words, k=8)).capitalize(),
+            'url': f"https://news.example.com/{i // 1000}/story-{i}",
+            'source': rng.choice(SOURCES),
+            'published_date': (start + timedelta(seconds=i * 2592000 // size)).isoformat(),
+            'summary': ' '.join(rng.choices(words, k=20))[:150],
+            'keywords': rng.sample(words, 5),
+        }
+        if with_content:
+            article['content'] = ' '.join(rng.choices(words, k=250))
+            article['duplicate_of'] = None
+        articles.append(article)
+    return articles
+
+
+def timed(function, repeats):
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def bench_format(output_format, path, document, repeats):
+    now = datetime.fromisoformat(document['articles'][-1]['published_date'])
+    reads = {
+        'load': lambda: output_format.load(path),
+        'projection': lambda: list(output_format.read(path, columns=PROJECTION)),
+        'predicate': lambda: list(output_format.read(path, since=now - timedelta(days=1), sources=[SOURCES[0]])),
+        'both': lambda: list(output_format.read(path, columns=PROJECTION, since=now - timedelta(days=1),
+                                                sources=[SOURCES[0]])),
+    }
+    result = {'write_ms': timed(lambda: output_format.write(path, document), 1)}
+    result['bytes'] = sum(os.path.getsize(part) for part in output_format.paths(path) if os.path.exists(part))
+    for name, read in reads.items():
+        result[f'{name}_ms'] = timed(read, repeats)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the report/archive output formats.")
+    parser.add_argument('--articles', type=int, default=100000)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--formats', nargs='+', choices=list(OUTPUT_FORMATS), default=list(OUTPUT_FORMATS))
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='output-formats-')
+    try:
+        for kind, with_content in (('report', False), ('archive', True)):
+            document = {'report_time': datetime.now().isoformat(), 'articles_count': args.articles,
+                        'articles': build_articles(args.articles, with_content)}
+            print(f"\n{kind}: {args.articles} articles")
+            print(f"  {'format':<9} {'size':>10} {'write':>9} {'load':>9} {'project':>9} {'filter':>9} {'both':>9}")
+            baseline = None
+            for name in args.formats:
+                try:
+                    output_format = OUTPUT_FORMATS[name]()
+                except ImportError as e:
+                    print(f"  {name:<9} unavailable ({str(e)})")
+                    continue
+                result = bench_format(output_format, os.path.join(work_dir, kind + output_format.extension),
+                                      document, args.repeats)
+                if name == JsonFormat.name:
+                    baseline = result
+                print(f"  {name:<9} {result['bytes'] / 2 ** 20:8.1f}MB {result['write_ms']:7.0f}ms "
+                      f"{result['load_ms']:7.0f}ms {result['projection_ms']:7.0f}ms {result['predicate_ms']:7.0f}ms "
+                      f"{result['both_ms']:7.0f}ms")
+                if baseline is not None and baseline is not result:
+                    print(f"  {'vs json':<9} {baseline['bytes'] / result['bytes']:9.1f}x {'':>9} "
+                          + ' '.join(f"{baseline[key] / result[key]:8.1f}x"
+                                     for key in ('load_ms', 'projection_ms', 'predicate_ms', 'both_ms')))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
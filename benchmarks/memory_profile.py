@@ -0,0 +1,150 @@
+"""Resident memory of one acquisition/analysis/reporting cycle, batch mode vs STREAMING_MODE.
+
+    python -m benchmarks.memory_profile --articles 100000 --analyse 5000
+
+A temporary database is seeded with articles of distinct random text (so the URL and near-duplicate
+indexes hold one entry per article), most of them already processed. Each mode then runs in a fresh
+process on its own copy of the database: the acquisition agent is constructed (building its dedup
+indexes), the analysis agent processes the unprocessed articles with the stub summarizer, and the
+reporting agent writes a full report. RSS is read after each stage.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEED_CORPUS = os.path.join(PROJECT_DIR, 'all_articles.json')
+MODES = ('batch', 'streaming')
+
+
+def current_rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kilobytes on Linux
+
+
+def vocabulary():
+    with open(SEED_CORPUS, 'r', encoding='utf-8') as f:
+        seed = json.load(f)
+    words = {word.lower() for article in seed for word in f"{article['title']} {article.get('content') or ''}".split()
+             if word.isalpha()}
+    return sorted(words)
+
+
+def populate(size, analyse):
+    """Seed the database in the current directory with `size` articles, all but `analyse` processed."""
+    from database.storage import ArticleStorage
+
+    words = vocabulary()
+    rng = random.Random(1)
+    now = datetime.now()
+    storage = ArticleStorage()
+    for start in range(0, size, 1000):
+        chunk = []
+        for i in range(start, min(size, start + 1000)):
+            chunk.append({
+                'title': ' '.join(rng.choices(words, k=8)).capitalize(),
+                'url': f"https://news.example.com/{i // 1000}/story-{i}",
+                'source': f"Source {i % 20}",
+                'published_date': (now - timedelta(seconds=i * 2592000 // size)).isoformat(),
+                'content': ' '.join(rng.choices(words, k=60)),
+                'duplicate_of': None,
+            })
+        storage.insert_articles(chunk)
+        processed = [article for article in chunk if article['id'] <= size - analyse]
+        storage.mark_processed([
+            {'id': article['id'], 'summary': article['content'][:150], 'keywords': article['title'].split()[:5]}
+            for article in processed
+        ])
+
+
+def measure(mode):
+    """Run one cycle in the current directory and return RSS after each stage."""
+    import utils.config as config
+    config.STREAMING_MODE = mode == 'streaming'
+    config.SUMMARY_BACKEND = 'stub'
+    config.SUMMARY_FALLBACK_BACKEND = None
+    config.ENABLE_SUMMARY_CACHE = False
+    config.REPORT_MODE = 'full'
+    config.REPORT_DIGESTS = []
+
+    import nltk
+    nltk.data.path.insert(0, os.path.join(PROJECT_DIR, 'nltk_data'))
+    from agents.data_acquisition_agent import DataAcquisitionAgent
+    from agents.content_analysis_agent import EnhancedContentAnalysisAgent
+    from agents.reporting_agent import EnhancedReportingAgent
+
+    stages = [{'stage': 'start', 'rss_mb': current_rss_mb(), 'peak_mb': peak_rss_mb()}]
+
+    def record(stage):
+        stages.append({'stage': stage, 'rss_mb': current_rss_mb(), 'peak_mb': peak_rss_mb()})
+
+    acquisition = DataAcquisitionAgent()
+    record('acquisition_init')
+    analysis = EnhancedContentAnalysisAgent()
+    analysis.run()
+    record('analysis_run')
+    reporting = EnhancedReportingAgent()
+    reporting.initialize()
+    reporting.run()
+    record('full_report')
+    acquisition.cleanup()
+    analysis.cleanup()
+    return stages
+
+
+def run_child(*args, cwd):
+    output = subprocess.check_output([sys.executable, '-m', 'benchmarks.memory_profile', *args], cwd=cwd,
+                                     env={**os.environ, 'PYTHONPATH': PROJECT_DIR}, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak memory of batch and streaming mode.")
+    parser.add_argument('--articles', type=int, default=100000)
+    parser.add_argument('--analyse', type=int, default=5000, help="Unprocessed articles for the analysis agent")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--populate', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--measure', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.populate or args.measure:
+        # Child process, started in its working directory; only the result line goes to stdout
+        from loguru import logger
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+        if args.populate:
+            populate(args.articles, args.analyse)
+            print(json.dumps({'articles': args.articles}))
+        else:
+            print(json.dumps(measure(args.measure)))
+        return
+
+    work_dir = tempfile.mkdtemp(prefix='memprofile-')
+    try:
+        seed_dir = os.path.join(work_dir, 'seed')
+        os.makedirs(seed_dir)
+        print(f"Seeding {args.articles} articles...")
+        run_child('--populate', '--articles', str(args.articles), '--analyse', str(args.analyse), cwd=seed_dir)
+        for mode in args.modes:
+            mode_dir = os.path.join(work_dir, mode)
+            shutil.copytree(seed_dir, mode_dir)
+            print(f"\n{mode} mode")
+            for stage in run_child('--measure', mode, cwd=mode_dir):
+                print(f"  {stage['stage']:<18} rss {stage['rss_mb']:8.1f} MB  peak {stage['peak_mb']:8.1f} MB")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Local stand-in for the OpenAI chat completions endpoint with configurable latency.
+
+    python -m benchmarks.openai_stub --port 8001 --latency 0.3
+
+Point the pipeline at it with OPENAI_API_BASE = "http://127.0.0.1:8001/v1" in utils/config.py.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.text import plain_text
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    summary_length = 150
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = body.get('messages', [{}])[-1].get('content', '')
+        text = plain_text(prompt.split('\n\n', 1)[-1])
+        payload = json.dumps({
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': text[:self.summary_length]},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': self.summary_length // 4,
+                      'total_tokens': (len(prompt) + self.summary_length) // 4},
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class OpenAIStubServer:
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        handler = type('ConfiguredStubHandler', (StubHandler,), {'latency': latency})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def api_base(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local OpenAI chat completions stand-in.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds to wait before each response")
+    args = parser.parse_args()
+    server = OpenAIStubServer(args.host, args.port, args.latency)
+    print(f"OpenAI stub listening on {server.api_base} with {args.latency}s latency")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.server.server_close()
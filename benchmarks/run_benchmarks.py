@@ -0,0 +1,281 @@
+"""Offline benchmark of the pipeline stages at several corpus sizes.
+
+    python -m benchmarks.run_benchmarks --sizes 1000 10000 100000 --stub-latency 0.05
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/<earlier run>.json
+
+Feeds and listing pages are replayed from benchmarks/fixtures over a local HTTP server, corpora are
+built by repeating all_articles.json with unique URLs, and OpenAI is replaced by benchmarks/openai_stub.
+Everything runs in a temporary directory, so the project's database and caches are untouched.
+Near-duplicate detection is disabled for the acquisition agent to keep its start-up cost out of
+the fetch timings.
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from loguru import logger
+
+from benchmarks.openai_stub import OpenAIStubServer
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(PROJECT_DIR, 'benchmarks', 'fixtures')
+RESULTS_DIR = os.path.join(PROJECT_DIR, 'benchmarks', 'results')
+SEED_CORPUS = os.path.join(PROJECT_DIR, 'all_articles.json')
+
+LISTING_PAGES = [
+    ('generic_homepage.html', {}),
+    ('press_release_list.html', {"item": "//ul[@class='news-list']/li[h3]", "title": ".//h3",
+                                 "summary": ".//p[@class='teaser']"}),
+]
+
+
+def percentile(sorted_samples, fraction):
+    return sorted_samples[min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))]
+
+
+class StageTimer:
+    """Collects one latency sample per call and the number of items each call handled."""
+
+    def __init__(self):
+        self.samples = []
+        self.items = 0
+
+    def measure(self, func, *args, items=1):
+        start = time.perf_counter()
+        result = func(*args)
+        self.samples.append(time.perf_counter() - start)
+        self.items += items
+        return result
+
+    def summary(self):
+        samples = sorted(self.samples)
+        total = sum(samples)
+        return {
+            'calls': len(samples),
+            'items': self.items,
+            'total_s': round(total, 4),
+            'throughput_per_s': round(self.items / total, 2) if total else None,
+            'p50_ms': round(percentile(samples, 0.5) * 1000, 3),
+            'p95_ms': round(percentile(samples, 0.95) * 1000, 3),
+        }
+
+
+def build_corpus(size):
+    """all_articles.json-style records, repeated with unique URLs and spread over the last 30 days."""
+    with open(SEED_CORPUS, 'r', encoding='utf-8') as f:
+        seed = json.load(f)
+    now = datetime.now()
+    corpus = []
+    for i in range(size):
+        base = seed[i % len(seed)]
+        corpus.append({
+            'id': None,
+            'title': base['title'],
+            'url': f"{base['url'].split('?')[0].rstrip('/')}/bench-{i}",
+            'source': base['source'],
+            'published_date': (now - timedelta(seconds=i * 2592000 // size)).isoformat(),
+            'content': base.get('content') or '',
+            'duplicate_of': None,
+        })
+    return corpus
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server():
+    handler = functools.partial(QuietHandler, directory=FIXTURES_DIR)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_size(size, args, fixture_url, stub):
+    # Imported here so the database engine and agent log files are created in the working directory
+    import openai  # Loaded up front, or the summarizer would import it inside the first timed batch
+    from nltk.corpus import stopwords
+    from database.models import Session
+    from database.storage import ArticleStorage
+    from utils.config import BATCH_SIZE
+    from utils.http_client import HostRateLimiter
+    from utils.keywords import KeywordExtractor, CorpusStats
+    from utils.summarizers import SummarizationPipeline, OpenAISummarizer
+    from utils.url_index import UrlIndex
+    import agents.data_acquisition_agent as acquisition
+    from agents.reporting_agent import EnhancedReportingAgent
+
+    results = {}
+    corpus = build_corpus(size)
+    storage = ArticleStorage()
+
+    timer = StageTimer()
+    for start in range(0, size, 1000):
+        chunk = corpus[start:start + 1000]
+        timer.measure(storage.insert_articles, chunk, items=len(chunk))
+    results['store_articles'] = timer.summary()
+
+    acquisition.ENABLE_DEDUPLICATION = False
+    agent = acquisition.DataAcquisitionAgent()
+    agent.fetcher.cache = None
+    agent.fetcher.limiter = HostRateLimiter(rate=0)
+    source = {'name': 'CoinDesk', 'url': fixture_url, 'rss': f"{fixture_url}/coindesk_feed.xml", 'type': 'rss'}
+    timer = StageTimer()
+    for _ in range(args.repeats):
+        timer.measure(agent.fetch_from_rss, source, items=50)
+    results['fetch_from_rss'] = timer.summary()
+
+    timer = StageTimer()
+    for filename, selectors in LISTING_PAGES:
+        with open(os.path.join(FIXTURES_DIR, filename), 'rb') as f:
+            page = f.read()
+        page_source = {'name': filename, 'url': fixture_url, 'selectors': selectors}
+        for _ in range(args.repeats):
+            timer.measure(agent.html_extractor.extract, page, page_source)
+    results['extract_articles'] = timer.summary()
+    agent.cleanup()
+
+    session = Session()
+    url_index = UrlIndex.build(session)
+    session.close()
+    probes = [article['url'] for article in corpus[::max(1, size // 5000)]]
+    probes += [f"{url}-missing" for url in probes]
+    timer = StageTimer()
+    for url in probes:
+        timer.measure(url_index.__contains__, url)
+    results['article_exists'] = timer.summary()
+
+    extractor = KeywordExtractor(stopwords.words('english'), CorpusStats(path=None))
+    timer = StageTimer()
+    keywords = []
+    for start in range(0, size, BATCH_SIZE):
+        texts = [article['content'] for article in corpus[start:start + BATCH_SIZE]]
+        keywords.extend(timer.measure(extractor.extract_batch, texts, items=len(texts)))
+    results['extract_keywords'] = timer.summary()
+
+    summarizer = SummarizationPipeline(backend=OpenAISummarizer(api_key='benchmark', api_base=stub.api_base),
+                                       requests_per_minute=0, tokens_per_minute=0)
+    timer = StageTimer()
+    sample = corpus[:min(size, args.summary_sample)]
+    for start in range(0, len(sample), BATCH_SIZE):
+        texts = [article['content'] for article in sample[start:start + BATCH_SIZE]]
+        timer.measure(summarizer.summarize_many, texts, items=len(texts))
+    results['generate_summary'] = timer.summary()
+
+    storage.mark_processed([
+        {'id': article['id'], 'summary': article['content'][:150], 'keywords': article_keywords}
+        for article, article_keywords in zip(corpus, keywords)
+    ])
+    reporting = EnhancedReportingAgent()
+    reporting.initialize()
+    timer = StageTimer()
+    for _ in range(args.report_repeats):
+        reporting.last_report_time = datetime.min
+        reporting.last_report_sequence = -1
+        timer.measure(reporting.generate_incremental_report, items=size)
+    results['generate_report'] = timer.summary()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous_path):
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    print(f"\nCompared with {previous.get('commit')} ({previous_path}): p50 ratio, >1 is slower")
+    for size, stages in current['results'].items():
+        for stage, stats in stages.items():
+            before = previous['results'].get(size, {}).get(stage)
+            if before and before['p50_ms']:
+                print(f"  {size:>7} {stage:<18} {stats['p50_ms'] / before['p50_ms']:6.2f}x")
+
+
+def _reset_work_dir():
+    from database.models import Base, get_engine, ensure_schema
+    from utils.config import REPORT_OUTPUT_DIR
+    engine = get_engine()
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    ensure_schema(engine)
+    shutil.rmtree(REPORT_OUTPUT_DIR, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages offline.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--stub-latency', type=float, default=0.05, help="Seconds per stub OpenAI response")
+    parser.add_argument('--summary-sample', type=int, default=1000, help="Articles summarised per size")
+    parser.add_argument('--repeats', type=int, default=20, help="Calls per fetch/extraction stage")
+    parser.add_argument('--report-repeats', type=int, default=3)
+    parser.add_argument('--output', help="Result file (default: benchmarks/results/<commit>_<time>.json)")
+    parser.add_argument('--compare', help="Earlier result file to compare p50 latencies against")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    import nltk
+    nltk.data.path.insert(0, os.path.join(PROJECT_DIR, 'nltk_data'))
+
+    fixture_server = start_fixture_server()
+    fixture_url = f"http://127.0.0.1:{fixture_server.server_address[1]}"
+    stub = OpenAIStubServer(latency=args.stub_latency).start()
+    run = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'results': {},
+    }
+
+    # The database engine resolves its file path on first import, so all sizes share one working
+    # directory and the tables and reports are reset between sizes
+    original_dir = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix='bench-')
+    os.chdir(work_dir)
+    try:
+        for size in args.sizes:
+            _reset_work_dir()
+            print(f"Running {size} articles...")
+            run['results'][str(size)] = run_size(size, args, fixture_url, stub)
+    finally:
+        os.chdir(original_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        stub.stop()
+        fixture_server.shutdown()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{run['commit'] or 'unknown'}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(run, f, indent=2)
+
+    for size, stages in run['results'].items():
+        print(f"\n{size} articles")
+        for stage, stats in stages.items():
+            print(f"  {stage:<18} p50 {stats['p50_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms  "
+                  f"{stats['throughput_per_s'] or 0:>12.1f} items/s")
+    print(f"\nResults written to {output}")
+    if args.compare:
+        compare(run, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Start-up time of the entry points: imports, agent construction and the slowest imported modules.
+
+    python -m benchmarks.startup_profile
+    python -m benchmarks.startup_profile --entry-points analysis worker --repeats 5 --top 15
+
+Each entry point runs in a fresh interpreter with -X importtime in an empty working directory
+(so the database, logs and caches are created from scratch, as for a new deployment or worker).
+The time to import the entry point's modules, to construct its agents and the whole process wall
+time are reported as the median over the repeats, followed by the top-level imports that took
+longest to import in the first run.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (import statement, construction statement)
+ENTRY_POINTS = {
+    'acquisition': ("from agents.data_acquisition_agent import DataAcquisitionAgent",
+                    "DataAcquisitionAgent()"),
+    'analysis': ("from agents.content_analysis_agent import EnhancedContentAnalysisAgent",
+                 "EnhancedContentAnalysisAgent()"),
+    'reporting': ("from agents.reporting_agent import EnhancedReportingAgent",
+                  "EnhancedReportingAgent()"),
+    'worker': ("import run_analysis_workers; from agents.content_analysis_agent import EnhancedContentAnalysisAgent",
+               "EnhancedContentAnalysisAgent()"),
+    'search': ("from database.search import SearchIndex",
+               "SearchIndex().search('bitcoin')"),
+    'main': ("import main",
+             "main.DataAcquisitionAgent(); main.EnhancedContentAnalysisAgent(); main.EnhancedReportingAgent()"),
+}
+
+CHILD_TEMPLATE = """
+import json
+import time
+start = time.perf_counter()
+from loguru import logger
+logger.remove()
+{imports}
+imported = time.perf_counter()
+{construct}
+constructed = time.perf_counter()
+print(json.dumps({{'import_ms': (imported - start) * 1000, 'construct_ms': (constructed - imported) * 1000}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Return [(package, cumulative microseconds)] for every top-level package in -X importtime output.
+
+    A package's cumulative time includes its submodules and whatever it imported first, so the
+    list shows which dependencies an entry point pays for at start-up.
+    """
+    packages = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        name = name.strip()
+        if '.' not in name and not name.startswith('_'):
+            packages.append((name, int(cumulative)))
+    return packages
+
+
+def run_entry_point(name, work_dir):
+    imports, construct = ENTRY_POINTS[name]
+    code = CHILD_TEMPLATE.format(imports=imports, construct=construct)
+    env = {**os.environ, 'PYTHONPATH': PROJECT_DIR}
+    nltk_data = os.path.join(PROJECT_DIR, 'nltk_data')
+    if os.path.isdir(nltk_data):
+        env.setdefault('NLTK_DATA', nltk_data)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=work_dir, env=env,
+                            capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode:
+        raise RuntimeError(f"{name} failed:\n{result.stderr[-2000:]}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return {**timings, 'wall_ms': wall_ms}, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile start-up time of the entry points.")
+    parser.add_argument('--entry-points', nargs='+', choices=list(ENTRY_POINTS), default=list(ENTRY_POINTS))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10, help="Slowest packages to list per entry point")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.entry_points:
+        runs = []
+        packages = []
+        for repeat in range(args.repeats):
+            work_dir = tempfile.mkdtemp(prefix='startup-')
+            try:
+                timings, imported = run_entry_point(name, work_dir)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            runs.append(timings)
+            if repeat == 0:
+                packages = sorted(imported, key=lambda package: package[1], reverse=True)[:args.top]
+        results[name] = {
+            **{key: round(statistics.median(run[key] for run in runs), 1) for key in ('import_ms', 'construct_ms', 'wall_ms')},
+            'slowest_packages': [{'package': package, 'cumulative_ms': round(us / 1000, 1)} for package, us in packages],
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'entry point':<12} {'import':>10} {'construct':>10} {'process':>10}")
+    for name, result in results.items():
+        print(f"{name:<12} {result['import_ms']:8.1f}ms {result['construct_ms']:8.1f}ms {result['wall_ms']:8.1f}ms")
+    for name, result in results.items():
+        if not result['slowest_packages']:
+            continue
+        print(f"\n{name}: slowest packages")
+        for package in result['slowest_packages']:
+            print(f"  {package['cumulative_ms']:8.1f}ms  {package['package']}")
+
+
+if __name__ == "__main__":
+    main()
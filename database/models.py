@@ -1,31 +1,124 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-# from utils.config import DATABASE_URL
+import sqlite3
+import threading
 
-Base = declarative_base()
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, LargeBinary, create_engine, event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import declarative_base, sessionmaker
 
-# Define your database URL in your config file
 from utils.config import DATABASE_URL
 
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+Base = declarative_base()
+
 class Article(Base):
     __tablename__ = 'articles'
 
     id = Column(Integer, primary_key=True)
     title = Column(String(255), nullable=False)
     url = Column(String(255), unique=True, nullable=False)
-    source = Column(String(100), nullable=False)
-    published_date = Column(DateTime, nullable=False)
+    url_key = Column(String(255), index=True)  # Normalized URL used for deduplication
+    source = Column(String(100), nullable=False, index=True)
+    published_date = Column(DateTime, nullable=False, index=True)
     content = Column(Text)
     summary = Column(Text)
     keywords = Column(String(255))
-    processed = Column(Boolean, default=False)
+    processed = Column(Boolean, default=False, index=True)
+    processed_at = Column(DateTime, index=True)
+    processed_seq = Column(Integer, default=0, index=True)  # Commit order of the analysis batch that stored the results
+    duplicate_of = Column(String(255))  # URL of the canonical article when this one is a near-duplicate
+    enriched_at = Column(DateTime)  # When the full article body was last fetched (successfully or not)
+    lease_owner = Column(String(64), index=True)  # Analysis worker currently holding this article
+    lease_expires = Column(DateTime, index=True)
+    story_id = Column(Integer, index=True)  # Story cluster assigned by trend detection
 
     def __repr__(self):
         return f"<Article(id={self.id}, title='{self.title}', source='{self.source}')>"
 
-engine = create_engine(DATABASE_URL)
-Base.metadata.create_all(engine)
-Session = sessionmaker(bind=engine)
\ No newline at end of file
+class TermCount(Base):
+    """Number of articles published in an hour that mention a keyword or topic."""
+    __tablename__ = 'term_counts'
+
+    bucket = Column(DateTime, primary_key=True)  # Start of the hour
+    kind = Column(String(16), primary_key=True)  # "keyword" or "topic"
+    term = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class Story(Base):
+    """A cluster of similar articles, grown online as articles are analysed."""
+    __tablename__ = 'stories'
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String(255), nullable=False)  # Title of the first article
+    size = Column(Integer, nullable=False, default=0)
+    first_seen = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime, nullable=False, index=True)  # Latest publication date among its articles
+    keywords = Column(Text)  # JSON {keyword: number of member articles with it}
+    sources = Column(Text)  # JSON {source: number of member articles}
+    centroid = Column(LargeBinary)  # Sum of the member articles' unit TF-IDF vectors (float32)
+    updated_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<Story(id={self.id}, title='{self.title}', size={self.size})>"
+
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers (analysis, reporting) run while acquisition writes
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+def ensure_schema(engine):
+    """Add columns and indexes declared on the models but missing from an older database file."""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                    if column.default is not None and column.default.is_scalar:
+                        # Existing rows would otherwise be NULL rather than the declared default
+                        connection.execute(table.update().values({column.name: column.default.arg}))
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """The process-wide engine, created and schema-checked on first use rather than at import time."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(DATABASE_URL)
+                Base.metadata.create_all(engine)
+                ensure_schema(engine)
+                _engine = engine
+    return _engine
+
+def dispose_engine(close=True):
+    """Drop pooled connections, e.g. with close=False in a forked child; a no-op if no engine was created."""
+    if _engine is not None:
+        _engine.dispose(close=close)
+
+class LazySessionFactory:
+    """Callable like a sessionmaker, bound to get_engine() on the first session."""
+
+    def __init__(self):
+        self._sessionmaker = None
+
+    def __call__(self, **kwargs):
+        if self._sessionmaker is None:
+            self._sessionmaker = sessionmaker(bind=get_engine())
+        return self._sessionmaker(**kwargs)
+
+Session = LazySessionFactory()
+
+def __getattr__(name):
+    # `from database.models import engine` keeps working, creating the engine at that point
+    if name == 'engine':
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
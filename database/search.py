@@ -0,0 +1,176 @@
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+
+from loguru import logger
+from sqlalchemy import text
+
+from database.models import get_engine
+from utils.config import SEARCH_RESULTS_LIMIT
+
+# Relative weights of title, content, summary and keywords in the BM25 ranking
+COLUMN_WEIGHTS = (10.0, 1.0, 3.0, 5.0)
+TERM_RE = re.compile(r'[\w\-]+\*?')
+RELATIVE_DATE_RE = re.compile(r'\b(?:in\s+the\s+)?(?:last|past)\s+(?:(\d+)\s+)?(hour|day|week|month)s?\b', re.I)
+TODAY_RE = re.compile(r'\btoday\b', re.I)
+DATE_UNITS = {'hour': timedelta(hours=1), 'day': timedelta(days=1), 'week': timedelta(weeks=1), 'month': timedelta(days=30)}
+INDEX_CHUNK_SIZE = 500
+
+CREATE_FTS_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts "
+    "USING fts5(title, content, summary, keywords, tokenize='porter unicode61')"
+)
+
+
+def parse_query(query, now=None):
+    """Split a free-text query into search terms and an optional start date.
+
+    "RWA tokenization last 7 days" -> (['RWA', 'tokenization'], now - 7 days). Also understands
+    "past week", "last 24 hours" and "today".
+    """
+    now = now or datetime.now()
+    since = None
+    match = RELATIVE_DATE_RE.search(query)
+    if match:
+        since = now - int(match.group(1) or 1) * DATE_UNITS[match.group(2).lower()]
+        query = query[:match.start()] + query[match.end():]
+    elif TODAY_RE.search(query):
+        since = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        query = TODAY_RE.sub(' ', query)
+    return TERM_RE.findall(query), since
+
+
+def match_expression(terms):
+    # Every term is quoted so FTS5 operators and punctuation in user input are taken literally;
+    # a trailing * is kept as a prefix search
+    quoted = []
+    for term in terms:
+        prefix = term.endswith('*')
+        term = term.rstrip('*')
+        if term:
+            quoted.append(f'"{term}"' + ('*' if prefix else ''))
+    return ' '.join(quoted)
+
+
+def sql_datetime(value):
+    # Same text format SQLAlchemy uses for DateTime columns on SQLite, so comparisons are exact
+    return value.isoformat(sep=' ', timespec='microseconds')
+
+
+class SearchIndex:
+    """Full-text index over article titles, content, summaries and keywords (SQLite FTS5).
+
+    Articles are indexed by id as analysis stores their results; `sync` catches up on processed
+    articles that are not indexed yet, e.g. after enabling the index on an existing database.
+    """
+
+    def __init__(self, engine=None):
+        engine = engine or get_engine()
+        if engine.dialect.name != 'sqlite':
+            raise RuntimeError(f"The search index requires SQLite FTS5, not {engine.dialect.name}")
+        self.engine = engine
+        with self.engine.begin() as connection:
+            connection.execute(text(CREATE_FTS_TABLE))
+
+    def index_articles(self, article_ids):
+        """(Re)index the given articles from their current rows in the articles table."""
+        article_ids = [article_id for article_id in article_ids if article_id is not None]
+        with self.engine.begin() as connection:
+            for start in range(0, len(article_ids), INDEX_CHUNK_SIZE):
+                chunk = article_ids[start:start + INDEX_CHUNK_SIZE]
+                params = {f"id{i}": article_id for i, article_id in enumerate(chunk)}
+                placeholders = ', '.join(f":{name}" for name in params)
+                connection.execute(text(f"DELETE FROM articles_fts WHERE rowid IN ({placeholders})"), params)
+                connection.execute(text(
+                    "INSERT INTO articles_fts (rowid, title, content, summary, keywords) "
+                    "SELECT id, title, coalesce(content, ''), coalesce(summary, ''), replace(coalesce(keywords, ''), ',', ' ') "
+                    f"FROM articles WHERE id IN ({placeholders})"
+                ), params)
+        return len(article_ids)
+
+    def sync(self):
+        """Index processed articles missing from the index. Returns the number added."""
+        with self.engine.begin() as connection:
+            result = connection.execute(text(
+                "INSERT INTO articles_fts (rowid, title, content, summary, keywords) "
+                "SELECT id, title, coalesce(content, ''), coalesce(summary, ''), replace(coalesce(keywords, ''), ',', ' ') "
+                "FROM articles WHERE processed = 1 AND id NOT IN (SELECT rowid FROM articles_fts)"
+            ))
+            added = max(result.rowcount, 0)
+        if added:
+            logger.info(f"Added {added} articles to the search index")
+        return added
+
+    def rebuild(self):
+        with self.engine.begin() as connection:
+            connection.execute(text("DELETE FROM articles_fts"))
+        return self.sync()
+
+    def search(self, query, source=None, since=None, until=None, limit=SEARCH_RESULTS_LIMIT, include_duplicates=False,
+               facets=True):
+        """Rank articles matching `query` by BM25.
+
+        Relative dates in the query ("last 7 days") set `since` unless it is given explicitly.
+        Returns {'query', 'total', 'results', 'facets'}, where facets count the keywords and sources
+        of every match, not only the returned page.
+        """
+        terms, query_since = parse_query(query)
+        since = since or query_since
+        expression = match_expression(terms)
+        response = {'query': expression, 'since': since.isoformat() if since else None, 'total': 0, 'results': [],
+                    'facets': {'keywords': [], 'sources': []}}
+        if not expression:
+            return response
+
+        # The unary + keeps SQLite from driving the query through the source/date indexes instead of
+        # the full-text match, which is far more selective
+        conditions = ["articles_fts MATCH :match"]
+        params = {'match': expression, 'limit': limit}
+        if source:
+            conditions.append("+a.source = :source")
+            params['source'] = source
+        if since:
+            conditions.append("+a.published_date >= :since")
+            params['since'] = sql_datetime(since)
+        if until:
+            conditions.append("+a.published_date < :until")
+            params['until'] = sql_datetime(until)
+        if not include_duplicates:
+            conditions.append("a.duplicate_of IS NULL")
+        where = ' AND '.join(conditions)
+        joined = "FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid"
+
+        with self.engine.connect() as connection:
+            rows = connection.execute(text(
+                f"SELECT a.id, a.title, a.url, a.source, a.published_date, a.summary, a.keywords, "
+                f"bm25(articles_fts, {', '.join(map(str, COLUMN_WEIGHTS))}) AS rank, "
+                f"snippet(articles_fts, -1, '[', ']', '...', 16) AS snippet "
+                f"{joined} WHERE {where} ORDER BY rank LIMIT :limit"
+            ), params).all()
+            response['results'] = [
+                {
+                    'id': row.id,
+                    'title': row.title,
+                    'url': row.url,
+                    'source': row.source,
+                    'published_date': datetime.fromisoformat(row.published_date).isoformat(),
+                    'summary': row.summary,
+                    'keywords': row.keywords.split(',') if row.keywords else [],
+                    'score': round(-row.rank, 4),
+                    'snippet': row.snippet,
+                }
+                for row in rows
+            ]
+
+            if facets:
+                keyword_counts = Counter()
+                source_counts = Counter()
+                for keywords, article_source in connection.execute(text(f"SELECT a.keywords, a.source {joined} WHERE {where}"), params):
+                    source_counts[article_source] += 1
+                    if keywords:
+                        keyword_counts.update(keywords.split(','))
+                response['total'] = sum(source_counts.values())
+                response['facets'] = {'keywords': keyword_counts.most_common(20), 'sources': source_counts.most_common()}
+            else:
+                response['total'] = connection.execute(text(f"SELECT count(*) {joined} WHERE {where}"), params).scalar()
+        return response
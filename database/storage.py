@@ -0,0 +1,252 @@
+from datetime import datetime
+
+from loguru import logger
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database.models import Session, Article
+from utils.url_index import normalize_url
+
+INSERT_CHUNK_SIZE = 500  # Stays well below SQLite's bound-parameter limit
+ARTICLE_COLUMNS = ('title', 'url', 'source', 'published_date', 'content', 'duplicate_of')
+
+
+def parse_datetime(value):
+    if isinstance(value, datetime) or value is None:
+        return value
+    return datetime.fromisoformat(value)
+
+
+def article_row_to_dict(article):
+    return {
+        'id': article.id,
+        'title': article.title,
+        'url': article.url,
+        'source': article.source,
+        'published_date': article.published_date.isoformat(),
+        'content': article.content,
+        'summary': article.summary,
+        'keywords': article.keywords.split(',') if article.keywords else [],
+        'processed': bool(article.processed),
+        'processed_at': article.processed_at.isoformat() if article.processed_at else None,
+        'processed_seq': article.processed_seq,
+        'duplicate_of': article.duplicate_of,
+    }
+
+
+class ArticleStorage:
+    """Bulk reads and writes against the `articles` table, the system of record for the pipeline."""
+
+    def __init__(self, session_factory=Session):
+        self.session_factory = session_factory
+
+    def insert_articles(self, articles):
+        """Insert article dicts, ignoring URLs already stored, and fill in each dict's `id`.
+
+        Returns the number of rows actually inserted.
+        """
+        inserted = 0
+        session = self.session_factory()
+        try:
+            for start in range(0, len(articles), INSERT_CHUNK_SIZE):
+                chunk = articles[start:start + INSERT_CHUNK_SIZE]
+                rows = [
+                    {**{column: article.get(column) for column in ARTICLE_COLUMNS},
+                     'url_key': normalize_url(article['url']),
+                     'published_date': parse_datetime(article.get('published_date')) or datetime.now(),
+                     'processed': False}
+                    for article in chunk
+                ]
+                result = session.execute(sqlite_insert(Article).values(rows).on_conflict_do_nothing(index_elements=['url']))
+                inserted += max(result.rowcount, 0)
+                ids = dict(session.query(Article.url, Article.id).filter(Article.url.in_([row['url'] for row in rows])))
+                for article in chunk:
+                    article['id'] = ids.get(article['url'])
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        return inserted
+
+    def mark_processed(self, results):
+        """Store analysis results. Each result needs `id`, `summary` and `keywords` (a list).
+
+        The rows also get the next processed_seq. The first UPDATE takes SQLite's write lock, so
+        sequence order is commit order: a reader that sees a sequence number also sees every batch
+        numbered before it. Returns the ids of the articles that were not processed before, read
+        under the same lock, so derived counts can be updated exactly once per article.
+        """
+        processed_at = datetime.now()
+        mappings = [
+            {
+                'id': result['id'],
+                'summary': result['summary'],
+                'keywords': ','.join(result['keywords'])[:255],
+                'processed': True,
+                'processed_at': processed_at,
+            }
+            for result in results if result.get('id') is not None
+        ]
+        if not mappings:
+            return []
+        session = self.session_factory()
+        first_time = []
+        try:
+            sequence = select(func.coalesce(func.max(Article.processed_seq), 0) + 1).scalar_subquery()
+            ids = [mapping['id'] for mapping in mappings]
+            for start in range(0, len(ids), INSERT_CHUNK_SIZE):
+                chunk = ids[start:start + INSERT_CHUNK_SIZE]
+                session.query(Article).filter(Article.id.in_(chunk)).update({'processed_seq': sequence}, synchronize_session=False)
+                if start == 0:
+                    # Numbered once, under the write lock the first UPDATE took; later chunks reuse the value
+                    sequence = session.query(func.max(Article.processed_seq)).scalar()
+                first_time.extend(article_id for (article_id,) in
+                                  session.query(Article.id).filter(Article.id.in_(chunk), Article.processed == False))
+            session.bulk_update_mappings(Article, mappings)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        return first_time
+
+    def iter_article_batches(self, batch_size, processed=None, include_duplicates=False, published_after=None, enriched=None,
+                             after_id=0):
+        """Yield lists of article dicts ordered by id (starting after `after_id`), paging on the primary key.
+
+        Each page is read in its own short session, so callers may write between pages.
+        """
+        last_id = after_id
+        while True:
+            session = self.session_factory()
+            try:
+                query = session.query(Article).filter(Article.id > last_id)
+                if processed is not None:
+                    query = query.filter(Article.processed == processed)
+                if not include_duplicates:
+                    query = query.filter(Article.duplicate_of.is_(None))
+                if published_after is not None:
+                    query = query.filter(Article.published_date > published_after)
+                if enriched is not None:
+                    query = query.filter(Article.enriched_at.isnot(None) if enriched else Article.enriched_at.is_(None))
+                batch = [article_row_to_dict(article) for article in query.order_by(Article.id).limit(batch_size)]
+            finally:
+                session.close()
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1]['id']
+
+    def update_contents(self, updates):
+        """Store enrichment results. Each update needs `id` and `enriched_at`, and optionally `content`."""
+        if not updates:
+            return 0
+        session = self.session_factory()
+        try:
+            session.bulk_update_mappings(Article, updates)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        return len(updates)
+
+    def iter_articles(self, batch_size=1000, **filters):
+        for batch in self.iter_article_batches(batch_size, **filters):
+            yield from batch
+
+    def iter_unprocessed_batches(self, batch_size):
+        return self.iter_article_batches(batch_size, processed=False)
+
+    def iter_window(self, column_name, start, end, batch_size=1000, processed=True, include_duplicates=False):
+        """Yield article dicts whose `column_name` (published_date, processed_at or processed_seq) lies in [start, end).
+
+        Pages on (column, id) so every page is an index range scan rather than a table scan.
+        """
+        column = getattr(Article, column_name)
+        last_value, last_id = None, None
+        while True:
+            session = self.session_factory()
+            try:
+                query = session.query(Article).filter(column >= start, column < end)
+                if last_value is not None:
+                    query = query.filter(or_(column > last_value, and_(column == last_value, Article.id > last_id)))
+                if processed is not None:
+                    query = query.filter(Article.processed == processed)
+                if not include_duplicates:
+                    query = query.filter(Article.duplicate_of.is_(None))
+                rows = query.order_by(column, Article.id).limit(batch_size).all()
+                if rows:
+                    last_value, last_id = getattr(rows[-1], column_name), rows[-1].id
+                batch = [article_row_to_dict(article) for article in rows]
+            finally:
+                session.close()
+            if not batch:
+                return
+            yield from batch
+
+    def get_articles(self, ids):
+        """Return article dicts for `ids`, ordered by id."""
+        session = self.session_factory()
+        try:
+            query = session.query(Article).filter(Article.id.in_(list(ids))).order_by(Article.id)
+            return [article_row_to_dict(article) for article in query]
+        finally:
+            session.close()
+
+    def count_window(self, column_name, start, end, processed=True, include_duplicates=False):
+        column = getattr(Article, column_name)
+        session = self.session_factory()
+        try:
+            query = session.query(func.count(Article.id)).filter(column >= start, column < end)
+            if processed is not None:
+                query = query.filter(Article.processed == processed)
+            if not include_duplicates:
+                query = query.filter(Article.duplicate_of.is_(None))
+            return query.scalar()
+        finally:
+            session.close()
+
+    def count(self, processed=None):
+        session = self.session_factory()
+        try:
+            query = session.query(func.count(Article.id))
+            if processed is not None:
+                query = query.filter(Article.processed == processed)
+            return query.scalar()
+        finally:
+            session.close()
+
+    def max_processed_seq(self):
+        session = self.session_factory()
+        try:
+            return session.query(func.max(Article.processed_seq)).scalar() or 0
+        finally:
+            session.close()
+
+    def max_id(self):
+        session = self.session_factory()
+        try:
+            return session.query(func.max(Article.id)).scalar() or 0
+        finally:
+            session.close()
+
+    def import_records(self, articles, summaries=()):
+        """One-shot import of legacy JSON/JSONL article and summary records."""
+        articles = list(articles)
+        inserted = self.insert_articles(articles)
+        summaries_by_url = {summary['url']: summary for summary in summaries}
+        ids = {article['url']: article['id'] for article in articles}
+        results = [
+            {'id': ids.get(url), 'summary': summary.get('summary'), 'keywords': summary.get('keywords') or []}
+            for url, summary in summaries_by_url.items()
+        ]
+        # Re-imported summaries are rewritten too; the first-time ids mark_processed returns only matter to trends
+        self.mark_processed(results)
+        updated = sum(1 for result in results if result['id'] is not None)
+        logger.info(f"Imported {inserted} articles and {updated} summaries into the database")
+        return inserted, updated
@@ -0,0 +1,175 @@
+import json
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import case, func, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database.models import Session, Article, TermCount, Story
+from utils.lazy import lazy_import
+
+np = lazy_import('numpy')  # Story centroids; stories are only built when numpy is installed
+
+STORY_KEYWORDS_KEPT = 20  # Most common keywords stored per story
+
+
+def story_row_to_dict(story):
+    return {
+        'id': story.id,
+        'title': story.title,
+        'size': story.size,
+        'first_seen': story.first_seen,
+        'last_seen': story.last_seen,
+        'keywords': json.loads(story.keywords or '{}'),
+        'sources': json.loads(story.sources or '{}'),
+        'centroid': story.centroid,
+    }
+
+
+class TrendStorage:
+    """Hourly keyword/topic counts and story clusters, shared by every analysis process through the database."""
+
+    def __init__(self, session_factory=Session):
+        self.session_factory = session_factory
+
+    def add_term_counts(self, counts):
+        """Add a {(bucket, kind, term): count} mapping to the stored hourly counts."""
+        rows = [{'bucket': bucket, 'kind': kind, 'term': term[:100], 'count': count}
+                for (bucket, kind, term), count in counts.items()]
+        if not rows:
+            return 0
+        statement = sqlite_insert(TermCount)
+        statement = statement.on_conflict_do_update(
+            index_elements=['bucket', 'kind', 'term'],
+            set_={'count': TermCount.count + statement.excluded['count']},
+        )
+        session = self.session_factory()
+        try:
+            # One compiled statement run with executemany; a multi-row VALUES upsert is recompiled every batch
+            session.execute(statement, rows)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        return len(rows)
+
+    def term_totals(self, start, split, end):
+        """Return {(kind, term): (count in [start, split), count in [split, end))} from the hourly buckets."""
+        session = self.session_factory()
+        try:
+            rows = session.query(
+                TermCount.kind,
+                TermCount.term,
+                func.sum(case((TermCount.bucket < split, TermCount.count), else_=0)),
+                func.sum(case((TermCount.bucket >= split, TermCount.count), else_=0)),
+            ).filter(TermCount.bucket >= start, TermCount.bucket < end).group_by(TermCount.kind, TermCount.term)
+            return {(kind, term): (before, after) for kind, term, before, after in rows}
+        finally:
+            session.close()
+
+    def stories_updated_since(self, updated_after, seen_after):
+        """Stories written after `updated_after` that received an article published after `seen_after`."""
+        session = self.session_factory()
+        try:
+            query = session.query(Story).filter(Story.updated_at > updated_after, Story.last_seen >= seen_after)
+            return [story_row_to_dict(story) for story in query]
+        finally:
+            session.close()
+
+    def save_stories(self, changes, assignments):
+        """Add a batch's changes to the stored stories and set `story_id` on the articles in
+        `assignments`, a list of (article id, story dict) pairs, in one transaction.
+
+        Each change holds a story dict (`id` None for a new story) and what the batch adds to it:
+        `size`, `first_seen`/`last_seen`, `keywords` and `sources` counters and the `vector` sum.
+        Existing stories are incremented rather than overwritten, so processes extending the same
+        story do not lose each other's articles. Sizes and dates are added in SQL; that first UPDATE
+        takes SQLite's write lock, so the centroids and counters read back and merged below cannot
+        change before the commit. The story dicts are then set to the stored totals.
+        """
+        updated_at = datetime.now()
+        session = self.session_factory()
+        try:
+            existing = {change['story']['id']: change for change in changes if change['story']['id'] is not None}
+            for story_id, change in existing.items():
+                session.execute(update(Story).where(Story.id == story_id).values(
+                    size=Story.size + change['size'],
+                    first_seen=func.min(Story.first_seen, change['first_seen']),
+                    last_seen=func.max(Story.last_seen, change['last_seen']),
+                    updated_at=updated_at,
+                ))
+            totals = []
+            rows = session.query(Story).filter(Story.id.in_(list(existing))) if existing else []
+            for row in rows:
+                change = existing[row.id]
+                keywords = Counter(json.loads(row.keywords or '{}')) + change['keywords']
+                sources = Counter(json.loads(row.sources or '{}')) + change['sources']
+                vector = np.frombuffer(row.centroid, dtype=np.float32) + change['vector']
+                row.keywords = json.dumps(dict(keywords.most_common(STORY_KEYWORDS_KEPT)))
+                row.sources = json.dumps(sources)
+                row.centroid = vector.tobytes()
+                totals.append((change['story'], row.id, row.size, row.first_seen, row.last_seen, keywords, sources, vector))
+            for change in changes:
+                if change['story']['id'] is not None:
+                    continue
+                row = Story(
+                    title=change['story']['title'][:255],
+                    size=change['size'],
+                    first_seen=change['first_seen'],
+                    last_seen=change['last_seen'],
+                    keywords=json.dumps(dict(change['keywords'].most_common(STORY_KEYWORDS_KEPT))),
+                    sources=json.dumps(change['sources']),
+                    centroid=change['vector'].tobytes(),
+                    updated_at=updated_at,
+                )
+                session.add(row)
+                session.flush()
+                totals.append((change['story'], row.id, row.size, row.first_seen, row.last_seen,
+                               change['keywords'], change['sources'], change['vector']))
+            ids = {id(story): story_id for story, story_id, *_ in totals}
+            session.bulk_update_mappings(Article, [
+                {'id': article_id, 'story_id': ids[id(story)]} for article_id, story in assignments
+            ])
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        for story, story_id, size, first_seen, last_seen, keywords, sources, vector in totals:
+            story.update(id=story_id, size=size, first_seen=first_seen, last_seen=last_seen, keywords=Counter(keywords),
+                         sources=dict(sources), vector=vector)
+
+    def trending_stories(self, start, end, limit):
+        """Stories with the most articles published in [start, end), largest first."""
+        session = self.session_factory()
+        try:
+            article_count = func.count(Article.id)
+            counts = session.query(Article.story_id, article_count).filter(
+                Article.story_id.isnot(None),
+                Article.published_date >= start,
+                Article.published_date < end,
+                Article.duplicate_of.is_(None),
+            ).group_by(Article.story_id).order_by(article_count.desc()).limit(limit).all()
+            stories = {story.id: story for story in session.query(Story).filter(Story.id.in_([id for id, _ in counts]))}
+            trending = []
+            for story_id, count in counts:
+                story = stories.get(story_id)
+                if story is None:
+                    continue
+                details = story_row_to_dict(story)
+                trending.append({
+                    'id': story.id,
+                    'title': story.title,
+                    'new_articles': count,
+                    'size': story.size,
+                    'first_seen': story.first_seen.isoformat(),
+                    'last_seen': story.last_seen.isoformat(),
+                    'keywords': list(details['keywords'])[:5],
+                    'sources': sorted(details['sources'], key=details['sources'].get, reverse=True),
+                })
+            return trending
+        finally:
+            session.close()
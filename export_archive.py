@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+from datetime import datetime
+
+from loguru import logger
+
+from database.storage import ArticleStorage
+from utils.config import ARCHIVE_OUTPUT_DIR, REPORT_FORMAT
+from utils.output_formats import OUTPUT_FORMATS, StreamedArray, get_output_format
+
+
+def export_archive(output_format, since=None, until=None, processed=None, include_duplicates=True, output=None):
+    """Write the articles table (content, summaries and keywords) published in [since, until) to one archive file.
+
+    Articles are read in published_date order, so row groups cover consecutive date ranges and
+    date-filtered reads skip most of the file.
+    """
+    storage = ArticleStorage()
+    start, end = since or datetime.min, until or datetime.max
+    archive_time = datetime.now()
+    archive = {
+        "archive_time": archive_time.isoformat(),
+        "since": since.isoformat() if since else None,
+        "until": until.isoformat() if until else None,
+        "articles_count": storage.count_window('published_date', start, end, processed=processed,
+                                               include_duplicates=include_duplicates),
+        "articles": StreamedArray(storage.iter_window('published_date', start, end, processed=processed,
+                                                      include_duplicates=include_duplicates)),
+    }
+    os.makedirs(ARCHIVE_OUTPUT_DIR, exist_ok=True)
+    path = output or os.path.join(ARCHIVE_OUTPUT_DIR, f"articles_{archive_time.strftime('%Y%m%d_%H%M%S')}{output_format.extension}")
+    output_format.write(path, archive)
+    logger.info(f"Archived {archive['articles_count']} articles to {path}")
+    return path
+
+
+def convert_json_file(output_format, json_path, output=None):
+    """Convert a legacy JSON file (an article array such as all_articles.json, or a JSON report)."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {"archive_time": datetime.now().isoformat(), "source_file": os.path.basename(json_path),
+                "articles_count": len(data), "articles": data}
+    path = output or os.path.splitext(json_path)[0] + output_format.extension
+    output_format.write(path, data)
+    logger.info(f"Converted {json_path} to {path}")
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export articles from the database, or convert a JSON file, "
+                                                 "to a compressed archive.")
+    parser.add_argument('--format', choices=list(OUTPUT_FORMATS), default=REPORT_FORMAT)
+    parser.add_argument('--since', type=datetime.fromisoformat, help="Published at or after (ISO date)")
+    parser.add_argument('--until', type=datetime.fromisoformat, help="Published before (ISO date)")
+    parser.add_argument('--processed-only', action='store_true', help="Only articles that have been analysed")
+    parser.add_argument('--exclude-duplicates', action='store_true', help="Leave out near-duplicate articles")
+    parser.add_argument('--from-json', metavar='PATH', help="Convert this JSON file instead of exporting the database")
+    parser.add_argument('--output', help="Output file (default: under ARCHIVE_OUTPUT_DIR, or next to --from-json)")
+    args = parser.parse_args()
+
+    output_format = get_output_format(args.format)
+    if args.from_json:
+        convert_json_file(output_format, args.from_json, args.output)
+    else:
+        export_archive(output_format, since=args.since, until=args.until, processed=True if args.processed_only else None,
+                       include_duplicates=not args.exclude_duplicates, output=args.output)
@@ -1,28 +1,39 @@
-from agents.enhanced_data_acquisition_agent import EnhancedDataAcquisitionAgent
-from agents.enhanced_content_analysis_agent import EnhancedContentAnalysisAgent
-from agents.enhanced_reporting_agent import EnhancedReportingAgent
+from agents.data_acquisition_agent import DataAcquisitionAgent
+from agents.content_analysis_agent import EnhancedContentAnalysisAgent
+from agents.reporting_agent import EnhancedReportingAgent
+from agents.pipeline_scheduler import PipelineScheduler
+from utils.config import PIPELINE_MODE, NORMAL_INTERVAL, RETRY_INTERVAL, METRICS_PORT
+from utils.metrics import metrics
 import time
 from loguru import logger
 
-def main():
-    daa = EnhancedDataAcquisitionAgent()
-    caa = EnhancedContentAnalysisAgent()
-    ra = EnhancedReportingAgent()
-
+def run_batch_loop(daa, caa, ra):
     while True:
         try:
             daa.run()
             caa.run()
             ra.run()
-            logger.info("Waiting for 15 minutes before next run...")
-            time.sleep(900)  # Wait for 15 minutes
+            logger.info(f"Waiting for {NORMAL_INTERVAL} seconds before next run...")
+            time.sleep(NORMAL_INTERVAL)
         except KeyboardInterrupt:
             logger.info("Agents stopped by user.")
             break
         except Exception as e:
             logger.error(f"An error occurred: {str(e)}")
-            logger.info("Retrying in 5 minutes...")
-            time.sleep(300)  # Wait for 5 minutes before retrying
+            logger.info(f"Retrying in {RETRY_INTERVAL} seconds...")
+            time.sleep(RETRY_INTERVAL)
+
+def main():
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+    daa = DataAcquisitionAgent()
+    caa = EnhancedContentAnalysisAgent()
+    ra = EnhancedReportingAgent()
+
+    if PIPELINE_MODE == "pipeline":
+        PipelineScheduler(daa, caa, ra).run_forever()
+    else:
+        run_batch_loop(daa, caa, ra)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
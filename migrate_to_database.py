@@ -0,0 +1,35 @@
+import json
+import os
+
+from loguru import logger
+from database.storage import ArticleStorage
+from utils.config import (
+    ALL_ARTICLES_FILE,
+    SUMMARIZED_ARTICLES_FILE,
+    ARTICLES_STORE_DIR,
+    SUMMARIES_STORE_DIR,
+)
+from utils.jsonl_store import JsonlStore
+
+
+def load_records(json_file, store_dir):
+    # Prefer the JSONL store when it has data, otherwise fall back to the legacy JSON array
+    store = JsonlStore(store_dir)
+    if not store.is_empty():
+        return list(store.iter_latest('url'))
+    if os.path.exists(json_file):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return []
+
+
+def migrate_to_database():
+    # Safe to run repeatedly: existing URLs are skipped and summaries are simply rewritten
+    articles = load_records(ALL_ARTICLES_FILE, ARTICLES_STORE_DIR)
+    summaries = load_records(SUMMARIZED_ARTICLES_FILE, SUMMARIES_STORE_DIR)
+    inserted, updated = ArticleStorage().import_records(articles, summaries)
+    logger.info(f"Migrated {inserted} articles and {updated} summaries into the database.")
+
+
+if __name__ == "__main__":
+    migrate_to_database()
@@ -0,0 +1,19 @@
+from loguru import logger
+from utils.config import (
+    ALL_ARTICLES_FILE,
+    SUMMARIZED_ARTICLES_FILE,
+    ARTICLES_STORE_DIR,
+    SUMMARIES_STORE_DIR,
+)
+from utils.jsonl_store import JsonlStore
+
+
+def migrate_to_jsonl():
+    # Safe to run repeatedly: a store that already holds records is left untouched
+    articles = JsonlStore(ARTICLES_STORE_DIR).migrate_from_json(ALL_ARTICLES_FILE)
+    summaries = JsonlStore(SUMMARIES_STORE_DIR).migrate_from_json(SUMMARIZED_ARTICLES_FILE)
+    logger.info(f"Migrated {articles} articles and {summaries} summaries.")
+
+
+if __name__ == "__main__":
+    migrate_to_jsonl()
@@ -0,0 +1,29 @@
+import argparse
+import json
+import time
+from datetime import datetime
+
+from utils.output_formats import read_articles
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the articles of a report or archive (any output format) "
+                                                 "as JSON lines, optionally only some columns, dates and sources.")
+    parser.add_argument('path')
+    parser.add_argument('--columns', nargs='+', help="Only these fields, e.g. title url published_date")
+    parser.add_argument('--since', type=datetime.fromisoformat, help="Published at or after (ISO date)")
+    parser.add_argument('--until', type=datetime.fromisoformat, help="Published before (ISO date)")
+    parser.add_argument('--source', nargs='+', help="Only articles from these sources")
+    parser.add_argument('--section', nargs='+', help="Only these report sections, e.g. new_articles")
+    parser.add_argument('--count', action='store_true', help="Print the number of matching articles and the read time")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    articles = read_articles(args.path, columns=args.columns, since=args.since, until=args.until, sources=args.source,
+                             sections=args.section)
+    if args.count:
+        count = sum(1 for _ in articles)
+        print(f"{count} articles ({(time.perf_counter() - start) * 1000:.1f} ms)")
+    else:
+        for article in articles:
+            print(json.dumps(article, ensure_ascii=False))
@@ -0,0 +1,56 @@
+import argparse
+import multiprocessing
+from multiprocessing.connection import wait
+import os
+import socket
+
+from loguru import logger
+from database.models import dispose_engine
+from database.storage import ArticleStorage
+from utils.config import ANALYSIS_WORKER_PROCESSES, WORK_QUEUE_BACKEND, WORK_POLL_INTERVAL
+from utils.work_queue import get_work_queue
+
+
+def worker_main(stop_when_empty):
+    # Connections inherited from the parent must not be shared across processes
+    dispose_engine(close=False)
+    from agents.content_analysis_agent import EnhancedContentAnalysisAgent
+
+    agent = EnhancedContentAnalysisAgent()
+    agent.initialize()
+    try:
+        agent.run_worker(get_work_queue(), f"{socket.gethostname()}-{os.getpid()}", stop_when_empty)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agent.cleanup()
+
+
+def run_analysis_workers(processes, stop_when_empty=False):
+    work_queue = get_work_queue()
+    storage = ArticleStorage()
+    work_queue.enqueue_unprocessed(storage)
+
+    workers = [multiprocessing.Process(target=worker_main, args=(stop_when_empty,)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    logger.info(f"Started {processes} analysis workers using the {WORK_QUEUE_BACKEND} work queue.")
+
+    try:
+        while any(worker.is_alive() for worker in workers):
+            wait([worker.sentinel for worker in workers if worker.is_alive()], timeout=WORK_POLL_INTERVAL)
+            # Newly acquired articles reach the Redis queue only through here; a no-op for SQLite
+            work_queue.enqueue_unprocessed(storage)
+    except KeyboardInterrupt:
+        logger.info("Analysis workers stopped by user.")
+    finally:
+        for worker in workers:
+            worker.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run content analysis in several worker processes.")
+    parser.add_argument('--workers', type=int, default=ANALYSIS_WORKER_PROCESSES or os.cpu_count() or 1)
+    parser.add_argument('--drain', action='store_true', help="Exit once no unprocessed articles are left")
+    args = parser.parse_args()
+    run_analysis_workers(args.workers, stop_when_empty=args.drain)
@@ -0,0 +1,49 @@
+import argparse
+import json
+import time
+from datetime import datetime
+
+from database.search import SearchIndex
+from utils.config import SEARCH_RESULTS_LIMIT
+
+
+def print_results(response, elapsed):
+    print(f"{response['total']} matches for {response['query']}"
+          f"{' since ' + response['since'] if response['since'] else ''} ({elapsed * 1000:.1f} ms)\n")
+    for result in response['results']:
+        print(f"{result['score']:8.3f}  {result['published_date'][:16]}  [{result['source']}] {result['title']}")
+        print(f"          {result['url']}")
+        if result['snippet']:
+            print(f"          {result['snippet']}")
+    if response['facets']['keywords']:
+        print("\nKeywords: " + ', '.join(f"{keyword} ({count})" for keyword, count in response['facets']['keywords']))
+    if response['facets']['sources']:
+        print("Sources:  " + ', '.join(f"{source} ({count})" for source, count in response['facets']['sources']))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search analysed articles, e.g. \"RWA tokenization last 7 days\".")
+    parser.add_argument('query', nargs='*', help="Search terms; a trailing * matches prefixes")
+    parser.add_argument('--source', help="Only articles from this source")
+    parser.add_argument('--since', type=datetime.fromisoformat, help="Published at or after (ISO date)")
+    parser.add_argument('--until', type=datetime.fromisoformat, help="Published before (ISO date)")
+    parser.add_argument('--limit', type=int, default=SEARCH_RESULTS_LIMIT)
+    parser.add_argument('--json', action='store_true', help="Print the raw response as JSON")
+    parser.add_argument('--sync', action='store_true', help="Index processed articles missing from the index first")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild the index from the articles table first")
+    args = parser.parse_args()
+
+    index = SearchIndex()
+    if args.rebuild:
+        print(f"Indexed {index.rebuild()} articles")
+    elif args.sync:
+        print(f"Indexed {index.sync()} new articles")
+    if args.query:
+        start = time.perf_counter()
+        response = index.search(' '.join(args.query), source=args.source, since=args.since, until=args.until,
+                                limit=args.limit)
+        elapsed = time.perf_counter() - start
+        if args.json:
+            print(json.dumps(response, indent=2))
+        else:
+            print_results(response, elapsed)
@@ -0,0 +1,103 @@
+import html
+import re
+
+from utils.config import REMOVE_HTML_TAGS, REMOVE_EXTRA_WHITESPACE
+from utils.lazy import lazy_import
+from utils.text import TAG_RE
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # lxml is optional; extraction falls back to BeautifulSoup
+    etree = lxml_html = None
+
+bs4 = lazy_import('bs4')  # Only needed without lxml
+
+SPACES_RE = re.compile(r'[ \t\r\f\v]+')
+BLANK_LINES_RE = re.compile(r'\n\s*\n\s*')
+
+BOILERPLATE_TAGS = ['script', 'style', 'noscript', 'iframe', 'form', 'nav', 'header', 'footer', 'aside', 'svg', 'button']
+POSITIVE_RE = re.compile(r'article|body|content|entry|main|post|story|text', re.I)
+NEGATIVE_RE = re.compile(
+    r'comment|share|social|related|promo|sidebar|newsletter|subscribe|advert|\bad\b|cookie|popup|modal|'
+    r'breadcrumb|menu|nav|footer|header|widget|sponsor', re.I
+)
+TEXT_TAGS = ['p', 'h2', 'h3', 'h4', 'li', 'blockquote']
+MIN_PARAGRAPH_LENGTH = 25
+
+
+def clean_text(text):
+    """Apply the REMOVE_HTML_TAGS / REMOVE_EXTRA_WHITESPACE options, keeping paragraph breaks."""
+    if REMOVE_HTML_TAGS:
+        text = html.unescape(TAG_RE.sub(' ', text))
+    if REMOVE_EXTRA_WHITESPACE:
+        text = BLANK_LINES_RE.sub('\n\n', SPACES_RE.sub(' ', text))
+        text = '\n'.join(line.strip() for line in text.split('\n')).strip()
+    return text
+
+
+def class_weight(element):
+    hints = f"{element.get('class', '')} {element.get('id', '')}"
+    weight = 0
+    if POSITIVE_RE.search(hints):
+        weight += 25
+    if NEGATIVE_RE.search(hints):
+        weight -= 25
+    return weight
+
+
+def link_density(element):
+    text_length = len(element.text_content()) or 1
+    return sum(len(link.text_content()) for link in element.iter('a')) / text_length
+
+
+def is_outermost_block(element, container):
+    # A list item inside a blockquote (or similar) is already part of the outer block's text
+    for ancestor in element.iterancestors():
+        if ancestor is container:
+            return True
+        if ancestor.tag in TEXT_TAGS:
+            return False
+    return True
+
+
+def extract_main_text(content):
+    """Readability-style main-text extraction from an article page.
+
+    Boilerplate elements are dropped, each paragraph scores its parent (and half its grandparent)
+    by length and comma count, and the text blocks of the best-scoring container are returned.
+    """
+    if etree is None:
+        soup = bs4.BeautifulSoup(content, 'html.parser')
+        for tag in soup(BOILERPLATE_TAGS):
+            tag.decompose()
+        return '\n\n'.join(p.get_text(' ', strip=True) for p in soup.find_all('p'))
+
+    try:
+        document = lxml_html.document_fromstring(content)
+    except (etree.ParserError, ValueError):
+        return ''
+    etree.strip_elements(document, *BOILERPLATE_TAGS, etree.Comment, with_tail=False)
+    for element in list(document.iter('div', 'section', 'ul', 'span')):
+        if element.getparent() is not None and class_weight(element) < 0:
+            element.drop_tree()
+
+    scores = {}
+    for paragraph in document.iter('p'):
+        text = paragraph.text_content().strip()
+        if len(text) < MIN_PARAGRAPH_LENGTH:
+            continue
+        score = 1 + text.count(',') + min(len(text) // 100, 3)
+        parent = paragraph.getparent()
+        grandparent = parent.getparent() if parent is not None else None
+        for container, share in ((parent, 1.0), (grandparent, 0.5)):
+            if container is None:
+                continue
+            if container not in scores:
+                scores[container] = class_weight(container) + (10 if container.tag == 'article' else 0)
+            scores[container] += score * share
+
+    if not scores:
+        return ''
+    best = max(scores, key=lambda element: scores[element] * (1 - link_density(element)))
+    blocks = (element.text_content().strip() for element in best.iter(*TEXT_TAGS) if is_outermost_block(element, best))
+    return '\n\n'.join(block for block in blocks if block)
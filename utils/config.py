@@ -15,6 +15,10 @@ NEWS_SOURCES = [
     {"name": "PRWeb", "url": "https://www.prweb.com/releases/news-releases-list/", "rss": "https://rss.app/feeds/4zjgvZfHGaKwST6D.xml", "type": "both"},
 ]
 
+# A web source may add "selectors": {"item": ..., "title": ..., "link": ..., "summary": ...} with XPath
+# expressions (title/link/summary relative to the item) to replace the generic class-based guesses, e.g.
+# "selectors": {"item": "//ul[@class='news-list']/li", "title": ".//h3", "summary": ".//p[@class='teaser']"}
+
 KEYWORD_RSS_FEEDS = [
     {"keyword": "Tokenization", "url": "https://rss.app/rss-feed?keyword=Tokenization&region=US&lang=en"},
     {"keyword": "DLT", "url": "https://rss.app/rss-feed?keyword=DLT&region=US&lang=en"},
@@ -24,23 +28,82 @@ KEYWORD_RSS_FEEDS = [
 ]
 
 OPENAI_API_KEY = "Your-api-key"
+OPENAI_API_BASE = None  # Override the OpenAI endpoint, e.g. "http://127.0.0.1:8001/v1" for benchmarks/openai_stub.py
 ALL_ARTICLES_FILE = "all_articles.json"
 SCRAPED_DATA_FILE = "scraped_articles.json"
 # Content Analysis Configuration
 SUMMARY_LENGTH = 150  # Maximum length of the summary
 KEYWORDS_PER_ARTICLE = 5  # Number of keywords to extract per article
+KEYWORD_CORPUS_FILE = "keyword_corpus.json"  # Document frequencies used to rank keywords by TF-IDF
+INCREMENTAL_ANALYSIS = True  # Only analyse articles not yet marked processed in the database
+
+# Full-text search over analysed articles (SQLite FTS5; query with search_articles.py)
+ENABLE_SEARCH_INDEX = True  # Index each analysed batch as its results are stored
+SEARCH_RESULTS_LIMIT = 20  # Default number of ranked results per query
+
+# Trend detection: hourly keyword/topic counts, spikes against a rolling baseline and story clustering,
+# updated on each analysed batch and summarised in the "trending" section of the articles report
+ENABLE_TREND_DETECTION = True
+TREND_WINDOW_HOURS = 24  # Recent window compared against the baseline
+TREND_BASELINE_DAYS = 7  # Rolling baseline before the recent window
+TREND_SPIKE_THRESHOLD = 3.0  # Minimum (count - expected) / sqrt(expected + 1) for a spike
+TREND_MIN_COUNT = 3  # Terms seen fewer times in the recent window are never reported as spiking
+STORY_SIMILARITY_THRESHOLD = 0.35  # Cosine similarity (TF-IDF) needed to join an existing story; requires numpy
+STORY_WINDOW_HOURS = 72  # Stories without a new article for this long are no longer extended
+STORY_MAX_ACTIVE = 5000  # Open stories kept in memory per process (least recently seen dropped first)
+STORY_VECTOR_SIZE = 2048  # Dimensions of the hashed TF-IDF vectors
+TRENDING_STORIES_LIMIT = 10
+
+# Summary cache (shared across runs and processes)
+ENABLE_SUMMARY_CACHE = True
+SUMMARY_CACHE_FILE = "summary_cache.db"
+SUMMARY_CACHE_TTL = 30 * 24 * 3600  # Seconds before a cached summary expires (0 disables expiry)
+SUMMARY_CACHE_MAX_ENTRIES = 100000  # Least recently used entries beyond this are evicted (0 disables the limit)
+
+# Summarization backend: "openai", "lsa" (local extractive, sumy) or "stub" (deterministic, offline)
+SUMMARY_BACKEND = "openai"
+SUMMARY_FALLBACK_BACKEND = "lsa"  # Used when the primary backend fails after retries (None to disable)
+SUMMARY_WORKERS = 8  # Concurrent summarization requests
+SUMMARY_REQUESTS_PER_MINUTE = 500  # Request rate limit for the summarization backend (0 disables)
+SUMMARY_TOKENS_PER_MINUTE = 60000  # Token rate limit for the summarization backend (0 disables)
 
 # Scheduling
 NORMAL_INTERVAL = 900  # 15 minutes in seconds
 RETRY_INTERVAL = 300   # 5 minutes in seconds
+PIPELINE_MODE = "pipeline"  # "pipeline": event-driven stages with per-source polling; "batch": the fixed sleep loop
+SOURCE_MIN_INTERVAL = 120  # Fastest a busy source is polled, in seconds
+SOURCE_MAX_INTERVAL = 3600  # Slowest a quiet source is polled, in seconds
+PIPELINE_QUEUE_SIZE = 1000  # Articles waiting for analysis before acquisition blocks
+REPORT_FLUSH_INTERVAL = 60  # Seconds to coalesce analysis results before writing a report
 
 # File Paths
 SUMMARIZED_ARTICLES_FILE = "summarized_articles.json"
+ARTICLES_STORE_DIR = "data/articles"  # Append-only JSONL article export
+SUMMARIES_STORE_DIR = "data/summaries"  # Append-only JSONL summary export
+JSONL_SEGMENT_MAX_BYTES = 16 * 1024 * 1024  # Start a new store segment once the current one reaches this size
+EXPORT_JSONL = False  # Also export articles and summaries to the JSONL stores (the database is the system of record)
 REPORT_OUTPUT_DIR = "reports"
+REPORT_MODE = "incremental"  # "incremental": only newly processed articles per report; "full": every article in every report
+REPORT_DIGESTS = ["hourly", "daily"]  # Rolling digests of articles analysed in the last complete hour/day
+DIGEST_GRACE_PERIOD = 60  # Seconds after a digest window closes before it is written, so late commits are included
+# Report and archive file format: "jsonl.gz" (gzip-compressed columnar JSON lines with an offset index),
+# "parquet" (requires pyarrow) or "json" (pretty-printed, the original format and the fallback)
+REPORT_FORMAT = "jsonl.gz"
+REPORT_ROW_GROUP_SIZE = 5000  # Articles per row group, the unit read (or skipped by date/source) by readers
+REPORT_COMPRESSION_LEVEL = 6  # gzip level for "jsonl.gz"
+PARQUET_COMPRESSION = "zstd"
+ARCHIVE_OUTPUT_DIR = "archives"  # Written by export_archive.py
 
 # Logging
 LOG_LEVEL = "INFO"
 
+# Metrics and tracing
+ENABLE_METRICS = True
+METRICS_FILE = "metrics.prom"  # Prometheus text-format snapshot written after each run (None to disable)
+METRICS_PORT = None  # Serve http://<host>:<port>/metrics from main.py when set, e.g. 9108
+ENABLE_TRACING = False  # Export spans through OpenTelemetry (requires opentelemetry-sdk)
+TRACING_SERVICE_NAME = "blockchain-intel"
+
 # # User Agent for web scraping (optional, but recommended)
 # USER_AGENT = "YourProjectName/1.0 (your@email.com)"
 
@@ -53,9 +116,24 @@ MAX_RETRIES = 3
 # Delay between retries (in seconds)
 RETRY_DELAY = 5
 
-# Rate limiting (requests per second)
+# Rate limiting (requests per second, per host)
 RATE_LIMIT = 1
 
+# Concurrent fetching
+CONCURRENT_FETCH = True  # Fetch all sources in parallel instead of one at a time
+MAX_FETCH_WORKERS = 8  # Size of the fetch thread pool
+MAX_CONNECTIONS_PER_HOST = 2  # Maximum simultaneous requests to a single host
+
+# Conditional fetching (ETag / Last-Modified / content hash)
+ENABLE_CONDITIONAL_FETCH = True
+HTTP_CACHE_FILE = "http_cache.json"
+
+# Article body enrichment: fetch each new article's page and replace the RSS/listing excerpt with its main text
+ENABLE_BODY_ENRICHMENT = False
+ENRICH_WORKERS = 8  # Concurrent article page downloads (per-host limits above still apply)
+ENRICH_BATCH_SIZE = 100  # Articles enriched and written back per batch, bounding memory use
+ENRICH_MAX_BYTES = 2 * 1024 * 1024  # Article pages are truncated beyond this size
+
 # Enable/Disable specific agents
 ENABLE_DATA_ACQUISITION = True
 ENABLE_CONTENT_ANALYSIS = True
@@ -71,12 +149,22 @@ REMOVE_EXTRA_WHITESPACE = True
 # Article deduplication
 ENABLE_DEDUPLICATION = True
 SIMILARITY_THRESHOLD = 0.9  # Threshold for considering articles as duplicates (0.0 to 1.0)
+NEAR_DUPLICATE_INDEX_FILE = "near_duplicates.idx"
 
 # Error handling
 MAX_ERRORS_BEFORE_ABORT = 10  # Maximum number of errors before aborting the entire process
 
 # Performance tuning
 BATCH_SIZE = 50  # Number of articles to process in a single batch
+STREAMING_MODE = False  # Keep memory flat for very large archives: URL dedup via the database, bounded near-duplicate window, streamed reports
+NEAR_DUPLICATE_WINDOW = 50000  # In streaming mode, near-duplicates are only detected among this many most recent articles
+
+# Analysis worker mode (run_analysis_workers.py)
+WORK_QUEUE_BACKEND = "sqlite"  # "sqlite": lease rows in the articles table (one machine); "redis": shared across machines
+REDIS_URL = "redis://localhost:6379/0"
+ANALYSIS_WORKER_PROCESSES = None  # Worker processes started on this machine (None: one per CPU core)
+WORK_LEASE_SECONDS = 300  # A claimed batch is handed to another worker if not acknowledged within this time
+WORK_POLL_INTERVAL = 5  # Seconds an idle worker waits before polling the queue again
 
 # # Proxy configuration (if needed)
 # USE_PROXY = False
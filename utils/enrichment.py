@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from loguru import logger
+
+from utils.article_text import extract_main_text, clean_text
+from utils.config import ENRICH_WORKERS, ENRICH_BATCH_SIZE, ENRICH_MAX_BYTES
+
+
+class BodyEnricher:
+    """Replaces article excerpts with the main text of the linked page.
+
+    Pages are downloaded through the shared fetcher, so its pooled session and per-host limits
+    apply. Each URL fails on its own: the article keeps its excerpt and is not retried.
+    """
+
+    def __init__(self, fetcher, storage, workers=ENRICH_WORKERS, max_bytes=ENRICH_MAX_BYTES):
+        self.fetcher = fetcher
+        self.storage = storage
+        self.max_bytes = max_bytes
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='enrich')
+
+    def enrich_pending(self):
+        """Enrich every unprocessed article that has not been attempted yet, one batch at a time."""
+        enriched = 0
+        for batch in self.storage.iter_article_batches(ENRICH_BATCH_SIZE, processed=False, enriched=False):
+            enriched += self.enrich(batch)
+        return enriched
+
+    def enrich(self, articles):
+        """Fetch bodies for `articles` (dicts with `id`, `url`, `content`), updating them in place
+        and in the database. Returns the number of articles whose content was replaced."""
+        enriched_at = datetime.now()
+        updates = []
+        for article, body in zip(articles, self.executor.map(self.fetch_body, articles)):
+            update = {'id': article['id'], 'enriched_at': enriched_at}
+            if body and len(body) > len(article.get('content') or ''):
+                article['content'] = update['content'] = body
+            updates.append(update)
+        self.storage.update_contents(updates)
+        replaced = sum(1 for update in updates if 'content' in update)
+        logger.info(f"Enriched {replaced} of {len(articles)} articles with full page text")
+        return replaced
+
+    def fetch_body(self, article):
+        try:
+            return clean_text(extract_main_text(self.fetcher.download(article['url'], self.max_bytes)))
+        except Exception as e:
+            logger.warning(f"Could not fetch article body from {article['url']}: {str(e)}")
+            return None
+
+    def close(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,123 @@
+import functools
+
+from loguru import logger
+
+from utils.lazy import lazy_import
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # lxml is optional; extraction falls back to BeautifulSoup
+    etree = lxml_html = None
+
+bs4 = lazy_import('bs4')  # Only needed without lxml
+
+ITEM_TAGS = ['article', 'div', 'li']
+ITEM_CLASSES = ['post', 'article', 'news-item']
+TITLE_TAGS = ['h2', 'h3', 'h4', 'a']
+TITLE_CLASSES = ['title', 'headline']
+SUMMARY_CLASSES = ['summary', 'excerpt']
+
+
+def has_class(*names):
+    return ' or '.join(f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in names)
+
+
+def any_tag(*tags):
+    return ' or '.join(f"self::{tag}" for tag in tags)
+
+
+# XPath equivalents of the generic class guesses; a source's "selectors" entry overrides any of them
+DEFAULT_PROFILE = {
+    'item': f"//*[{any_tag(*ITEM_TAGS)}][{has_class(*ITEM_CLASSES)}]",
+    'title': f".//*[{any_tag(*TITLE_TAGS)}][{has_class(*TITLE_CLASSES)}]",
+    'link': ".//a[@href]",
+    'summary': f".//p[{has_class(*SUMMARY_CLASSES)}]",
+}
+
+
+def has_item_class(value):
+    # SoupStrainer sees the raw attribute string while parsing, so match class tokens explicitly
+    if not value:
+        return False
+    tokens = value.split() if isinstance(value, str) else value
+    return any(token in ITEM_CLASSES for token in tokens)
+
+
+@functools.lru_cache(maxsize=None)
+def item_strainer():
+    return bs4.SoupStrainer(ITEM_TAGS, class_=has_item_class)
+
+
+def absolute_url(href, source):
+    return href if href.startswith('http') else source['url'] + href
+
+
+def extract_with_soup(content, source, parse_only=None):
+    """Generic-class extraction on a BeautifulSoup tree (optionally restricted by a SoupStrainer)."""
+    soup = bs4.BeautifulSoup(content, 'html.parser', parse_only=parse_only)
+    articles = []
+    for article in soup.find_all(ITEM_TAGS, class_=ITEM_CLASSES):
+        title_tag = article.find(TITLE_TAGS, class_=TITLE_CLASSES)
+        link_tag = article.find('a', href=True)
+        if title_tag and link_tag:
+            summary_tag = article.find('p', class_=SUMMARY_CLASSES)
+            articles.append({
+                'title': title_tag.text.strip(),
+                'url': absolute_url(link_tag['href'], source),
+                'summary': summary_tag.text.strip() if summary_tag else ''
+            })
+    return articles
+
+
+class CompiledProfile:
+    def __init__(self, selectors):
+        profile = {**DEFAULT_PROFILE, **selectors}
+        self.item = etree.XPath(profile['item'])
+        # Only the first match inside each item is used, so let libxml2 stop there
+        self.title = etree.XPath(f"({profile['title']})[1]")
+        self.link = etree.XPath(f"({profile['link']})[1]")
+        self.summary = etree.XPath(f"({profile['summary']})[1]")
+
+
+class HtmlExtractor:
+    """Extracts article links from listing pages.
+
+    With lxml installed, pages are parsed by libxml2 and items are located with XPath selectors
+    compiled once per source profile; only the matched nodes are turned into Python strings.
+    Without lxml, a SoupStrainer limits the BeautifulSoup tree to the candidate item tags.
+    """
+
+    def __init__(self):
+        self._profiles = {}
+
+    def extract(self, content, source):
+        if etree is None:
+            if source.get('selectors'):
+                logger.warning(f"lxml is not installed; ignoring selector profile for {source.get('name')}")
+            return extract_with_soup(content, source, item_strainer())
+        return self.extract_with_lxml(content, source)
+
+    def profile_for(self, source):
+        key = tuple(sorted(source.get('selectors', {}).items()))
+        if key not in self._profiles:
+            self._profiles[key] = CompiledProfile(source.get('selectors', {}))
+        return self._profiles[key]
+
+    def extract_with_lxml(self, content, source):
+        profile = self.profile_for(source)
+        try:
+            document = lxml_html.document_fromstring(content)
+        except (etree.ParserError, ValueError):
+            return []
+        articles = []
+        for item in profile.item(document):
+            titles = profile.title(item)
+            links = profile.link(item)
+            if titles and links:
+                summaries = profile.summary(item)
+                articles.append({
+                    'title': titles[0].text_content().strip(),
+                    'url': absolute_url(links[0].get('href'), source),
+                    'summary': summaries[0].text_content().strip() if summaries else ''
+                })
+        return articles
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError, RequestException
+from loguru import logger
+
+from utils.metrics import metrics
+
+from utils.config import (
+    REQUEST_TIMEOUT,
+    MAX_RETRIES,
+    RETRY_DELAY,
+    RATE_LIMIT,
+    MAX_CONNECTIONS_PER_HOST,
+    MAX_FETCH_WORKERS,
+    VERIFY_SSL,
+    ENABLE_CONDITIONAL_FETCH,
+    HTTP_CACHE_FILE,
+)
+
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+FetchResult = namedtuple('FetchResult', ['url', 'content', 'changed'])
+
+
+class HostRateLimiter:
+    """Limits concurrent connections and request rate (requests per second) per host."""
+
+    def __init__(self, rate=RATE_LIMIT, max_connections=MAX_CONNECTIONS_PER_HOST):
+        self.rate = rate
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_slot = {}
+
+    @contextmanager
+    def acquire(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, threading.BoundedSemaphore(self.max_connections))
+        semaphore.acquire()
+        try:
+            self._wait_for_slot(host)
+            yield
+        finally:
+            semaphore.release()
+
+    def _wait_for_slot(self, host):
+        if not self.rate or self.rate <= 0:
+            return
+        interval = 1.0 / self.rate
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ValidatorCache:
+    """Persistent per-URL ETag / Last-Modified / content hash store used for conditional requests."""
+
+    def __init__(self, path=HTTP_CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = self._load()
+        self.reset_stats()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error(f"Error loading HTTP cache {self.path}: {str(e)}. Starting with empty cache.")
+            return {}
+
+    def save(self):
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+
+    def reset_stats(self):
+        self.stats = {'sources_skipped': 0, 'bytes_saved': 0, 'parse_time_avoided': 0.0}
+
+    def get(self, url):
+        with self._lock:
+            return dict(self.entries.get(url, {}))
+
+    def update(self, url, **fields):
+        with self._lock:
+            self.entries.setdefault(url, {}).update(fields)
+
+    def invalidate(self, url):
+        with self._lock:
+            self.entries.pop(url, None)
+
+    def conditional_headers(self, url):
+        entry = self.get(url)
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record_skip(self, url, bytes_saved=0):
+        entry = self.get(url)
+        with self._lock:
+            self.stats['sources_skipped'] += 1
+            self.stats['bytes_saved'] += bytes_saved
+            self.stats['parse_time_avoided'] += entry.get('parse_time', 0.0)
+
+    def record_parse_time(self, url, seconds):
+        self.update(url, parse_time=seconds)
+
+
+class HttpFetcher:
+    """Thread-safe HTTP GET with per-host throttling, timeouts and retries."""
+
+    def __init__(self, timeout=REQUEST_TIMEOUT, max_retries=MAX_RETRIES, retry_delay=RETRY_DELAY, limiter=None, cache=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.limiter = limiter or HostRateLimiter()
+        self.cache = cache if cache is not None else (ValidatorCache() if ENABLE_CONDITIONAL_FETCH else None)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=MAX_FETCH_WORKERS, pool_maxsize=MAX_FETCH_WORKERS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url, headers=None, stream=False):
+        request_headers = dict(DEFAULT_HEADERS)
+        if headers:
+            request_headers.update(headers)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                with self.limiter.acquire(url):
+                    response = self.session.get(url, timeout=self.timeout, headers=request_headers, verify=VERIFY_SSL, stream=stream)
+                metrics.inc('http_requests_total', host=urlparse(url).netloc, status=response.status_code)
+                response.raise_for_status()
+                return response
+            except RequestException as e:
+                if not isinstance(e, HTTPError):
+                    metrics.inc('http_request_errors_total', host=urlparse(url).netloc, error=type(e).__name__)
+                if attempt > self.max_retries or not self._is_retryable(e):
+                    raise
+                logger.warning(f"Request to {url} failed ({str(e)}), retry {attempt}/{self.max_retries} in {self.retry_delay * attempt}s")
+                time.sleep(self.retry_delay * attempt)
+
+    def fetch(self, url):
+        """GET `url`, returning changed=False when the server answers 304 or the body hash is unchanged."""
+        if self.cache is None:
+            return FetchResult(url, self.get(url).content, True)
+
+        response = self.get(url, headers=self.cache.conditional_headers(url))
+        if response.status_code == 304:
+            self.cache.record_skip(url, bytes_saved=self.cache.get(url).get('content_length', 0))
+            return FetchResult(url, None, False)
+
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        unchanged = self.cache.get(url).get('content_hash') == content_hash
+        self.cache.update(
+            url,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            content_hash=content_hash,
+            content_length=len(response.content),
+        )
+        if unchanged:
+            self.cache.record_skip(url)
+            return FetchResult(url, response.content, False)
+        return FetchResult(url, response.content, True)
+
+    def download(self, url, max_bytes):
+        """GET `url` without conditional caching, reading at most `max_bytes` of the body."""
+        response = self.get(url, stream=True)
+        try:
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= max_bytes:
+                    logger.warning(f"{url} is larger than {max_bytes} bytes, truncating")
+                    break
+            return b''.join(chunks)[:max_bytes]
+        finally:
+            response.close()
+
+    def _is_retryable(self, error):
+        if isinstance(error, HTTPError) and error.response is not None:
+            return error.response.status_code in RETRYABLE_STATUS_CODES
+        return True
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.save()
+        self.session.close()
@@ -0,0 +1,130 @@
+import glob
+import json
+import os
+import threading
+
+from loguru import logger
+
+from utils.config import JSONL_SEGMENT_MAX_BYTES
+
+
+class JsonlStore:
+    """Append-only store of JSON records, one per line, split across numbered segment files.
+
+    Appends are flushed and fsynced, so a crash can at most leave a truncated final
+    line, which readers skip. When the active segment grows past `segment_max_bytes`
+    a new segment is started; sealed segments are never rewritten.
+    """
+
+    def __init__(self, directory, segment_max_bytes=JSONL_SEGMENT_MAX_BYTES):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def segments(self):
+        return sorted(glob.glob(os.path.join(self.directory, 'segment-*.jsonl')))
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f'segment-{number:06d}.jsonl')
+
+    @staticmethod
+    def _segment_number(path):
+        return int(os.path.basename(path)[len('segment-'):-len('.jsonl')])
+
+    def _active_segment(self):
+        segments = self.segments()
+        if segments and os.path.getsize(segments[-1]) < self.segment_max_bytes:
+            return segments[-1]
+        return self._new_segment(self._segment_number(segments[-1]) if segments else 0)
+
+    def _new_segment(self, last_number):
+        # Create the segment under a temporary name first so readers never see a half-created file
+        path = self._segment_path(last_number + 1)
+        tmp_path = f"{path}.tmp"
+        open(tmp_path, 'w').close()
+        os.replace(tmp_path, path)
+        return path
+
+    def is_empty(self):
+        return not any(os.path.getsize(path) for path in self.segments())
+
+    def append(self, records):
+        """Append `records` (an iterable of dicts) and return how many were written."""
+        count = 0
+        with self._lock:
+            path = self._active_segment()
+            self._terminate_partial_line(path)
+            f = open(path, 'a', encoding='utf-8')
+            try:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    count += 1
+                    if f.tell() >= self.segment_max_bytes:
+                        self._sync_and_close(f)
+                        path = self._new_segment(self._segment_number(path))
+                        f = open(path, 'a', encoding='utf-8')
+            finally:
+                self._sync_and_close(f)
+        return count
+
+    @staticmethod
+    def _terminate_partial_line(path):
+        # A crash mid-append can leave a line without its newline; close it off so the
+        # next record starts on a fresh line and only the truncated record is lost
+        with open(path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+
+    @staticmethod
+    def _sync_and_close(f):
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+
+    def __iter__(self):
+        return self.iter_records()
+
+    def iter_records(self):
+        """Yield every stored record in append order, skipping corrupt or truncated lines."""
+        for path in self.segments():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping corrupt record at {path}:{line_number}")
+
+    def iter_latest(self, key='url'):
+        """Yield only the most recent record for each `key`, in the order those records were appended.
+
+        Memory use is proportional to the number of distinct keys, not the size of the records.
+        """
+        latest = {}
+        for position, record in enumerate(self.iter_records()):
+            latest[record.get(key)] = position
+        keep = set(latest.values())
+        del latest
+        for position, record in enumerate(self.iter_records()):
+            if position in keep:
+                yield record
+
+    def migrate_from_json(self, json_path):
+        """One-shot import of a legacy JSON array file. Does nothing once the store has data."""
+        if not self.is_empty() or not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except json.JSONDecodeError:
+            logger.error(f"Error decoding JSON from {json_path}. Nothing migrated.")
+            return 0
+        count = self.append(records)
+        logger.info(f"Migrated {count} records from {json_path} to {self.directory}")
+        return count
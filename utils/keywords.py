@@ -0,0 +1,122 @@
+import functools
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+from loguru import logger
+
+from utils.config import KEYWORDS_PER_ARTICLE, KEYWORD_CORPUS_FILE
+from utils.text import TAG_RE
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+@functools.lru_cache(maxsize=None)
+def load_stop_words(language='english'):
+    """NLTK's stop word list, read (importing nltk) once per process when first needed."""
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words(language))
+
+
+class CorpusStats:
+    """Document-frequency table over every article seen so far, updated one batch at a time."""
+
+    def __init__(self, path=KEYWORD_CORPUS_FILE):
+        self.path = path
+        self.document_count = 0
+        self.document_frequency = Counter()
+        # Documents added since the last save; saving merges these into the file so several
+        # analysis worker processes sharing the corpus file do not overwrite each other's counts
+        self._unsaved_count = 0
+        self._unsaved_frequency = Counter()
+        self._lock = threading.Lock()
+        self.document_count, self.document_frequency = self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return 0, Counter()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return state['document_count'], Counter(state['document_frequency'])
+        except (OSError, json.JSONDecodeError, KeyError) as e:
+            logger.error(f"Error loading keyword corpus {self.path}: {str(e)}. Starting with empty corpus.")
+            return 0, Counter()
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            document_count, document_frequency = self._load()
+            self.document_count = document_count + self._unsaved_count
+            self.document_frequency = document_frequency + self._unsaved_frequency
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'document_count': self.document_count, 'document_frequency': self.document_frequency}, f)
+            os.replace(tmp_path, self.path)
+            self._unsaved_count = 0
+            self._unsaved_frequency = Counter()
+
+    def add_documents(self, term_sets):
+        with self._lock:
+            for terms in term_sets:
+                self.document_count += 1
+                self.document_frequency.update(terms)
+                self._unsaved_count += 1
+                self._unsaved_frequency.update(terms)
+
+    def idf(self, term):
+        # Smoothed inverse document frequency, always positive
+        return math.log((1 + self.document_count) / (1 + self.document_frequency.get(term, 0))) + 1.0
+
+
+class KeywordExtractor:
+    """Ranks each document's terms by TF-IDF against the running corpus."""
+
+    def __init__(self, stop_words=None, corpus=None):
+        # Without explicit stop words, NLTK's English list is loaded on the first tokenize()
+        self._stop_words = frozenset(stop_words) if stop_words is not None else None
+        self.corpus = corpus if corpus is not None else CorpusStats()
+
+    @property
+    def stop_words(self):
+        if self._stop_words is None:
+            self._stop_words = load_stop_words()
+        return self._stop_words
+
+    def tokenize(self, text):
+        stop_words = self.stop_words
+        return [
+            token for token in TOKEN_RE.findall(TAG_RE.sub(' ', text or '').lower())
+            if token not in stop_words and len(token) > 1 and not token.isdigit()
+        ]
+
+    def score_batch(self, texts, new_documents=None):
+        """Return each text's {term: TF-IDF weight}, in input order.
+
+        Texts flagged in `new_documents` (all of them by default) are first added to the corpus;
+        pass False for texts already counted, such as articles being analysed again.
+        """
+        rows = [Counter(self.tokenize(text)) for text in texts]
+        if new_documents is None:
+            self.corpus.add_documents(rows)
+        else:
+            self.corpus.add_documents(row for row, new in zip(rows, new_documents) if new)
+
+        idf = {term: self.corpus.idf(term) for term in set().union(*rows)} if rows else {}
+        weights = []
+        for row in rows:
+            length = sum(row.values())
+            weights.append({term: count / length * idf[term] for term, count in row.items()})
+        return weights
+
+    def top_terms(self, weights, top_k=KEYWORDS_PER_ARTICLE):
+        return [term for term, _ in heapq.nlargest(top_k, weights.items(), key=lambda item: (item[1], item[0]))]
+
+    def extract_batch(self, texts, top_k=KEYWORDS_PER_ARTICLE):
+        """Return the top `top_k` keywords for each text, in input order."""
+        return [self.top_terms(weights, top_k) for weights in self.score_batch(texts)]
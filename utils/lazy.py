@@ -0,0 +1,60 @@
+import importlib
+import importlib.util
+import threading
+
+from loguru import logger
+
+_log_files = set()
+_log_files_lock = threading.Lock()
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access.
+
+    Heavy dependencies (openai, numpy, feedparser, BeautifulSoup) are bound at module level with
+    lazy_import() so that importing an agent, a CLI or a worker does not pay for them until the
+    code path that needs them runs.
+    """
+
+    def __init__(self, name):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_module', None)
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            # importlib's per-module lock makes concurrent first uses import it once
+            module = importlib.import_module(self._name)
+            object.__setattr__(self, '_module', module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
+
+
+def module_available(name):
+    """Whether `name` can be imported, without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def add_log_file(path, **kwargs):
+    """Add a loguru file sink once per process; agents call this when constructed rather than on import."""
+    with _log_files_lock:
+        if path in _log_files:
+            return
+        logger.add(path, **kwargs)
+        _log_files.add(path)
@@ -0,0 +1,208 @@
+import bisect
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from loguru import logger
+
+from utils.config import ENABLE_METRICS, METRICS_FILE, ENABLE_TRACING, TRACING_SERVICE_NAME
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        with self._lock:
+            self._values[label_key(labels)] += amount
+
+    def value(self, **labels):
+        return self._values.get(label_key(labels), 0.0)
+
+    def render(self):
+        with self._lock:
+            return [f"{self.name}{format_labels(key)} {value:g}" for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._values = {}  # label key -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = label_key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            state[bisect.bisect_left(self.buckets, value)] += 1
+            state[-1] += value
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), state[:-1]):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{format_labels(key, [('le', str(bound))])} {cumulative}")
+                lines.append(f"{self.name}_sum{format_labels(key)} {state[-1]:g}")
+                lines.append(f"{self.name}_count{format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide counters, histograms and timed spans, rendered in the Prometheus text format.
+
+    Spans record their duration in a `<name>_duration_seconds` histogram, count failures in
+    `<name>_errors_total`, and are also exported as OpenTelemetry spans when tracing is enabled.
+    """
+
+    def __init__(self, enabled=ENABLE_METRICS):
+        self.enabled = enabled
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.tracer = init_tracer() if ENABLE_TRACING else None
+
+    def _get(self, cls, name, documentation, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, documentation, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, documentation=''):
+        return self._get(Counter, name, documentation)
+
+    def histogram(self, name, documentation='', buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, documentation, buckets=buckets)
+
+    def inc(self, name, amount=1, **labels):
+        if self.enabled:
+            self.counter(name).inc(amount, **labels)
+
+    def observe(self, name, value, **labels):
+        if self.enabled:
+            self.histogram(name).observe(value, **labels)
+
+    @contextmanager
+    def span(self, name, **labels):
+        if not self.enabled and self.tracer is None:
+            yield
+            return
+        trace_span = self.tracer.start_as_current_span(name, attributes=labels) if self.tracer else None
+        if trace_span is not None:
+            trace_span.__enter__()
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.inc(f"{name}_errors_total", error=type(e).__name__, **labels)
+            if trace_span is not None:
+                trace_span.__exit__(type(e), e, e.__traceback__)
+                trace_span = None
+            raise
+        finally:
+            self.observe(f"{name}_duration_seconds", time.perf_counter() - start, **labels)
+            if trace_span is not None:
+                trace_span.__exit__(None, None, None)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        for metric in metrics:
+            if metric.documentation:
+                lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path=METRICS_FILE):
+        """Atomically write all metrics to `path` (e.g. for the node_exporter textfile collector)."""
+        if not self.enabled or not path:
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.render())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Error writing metrics to {path}: {str(e)}")
+
+    def serve(self, port, host='0.0.0.0'):
+        """Expose the metrics at http://host:port/metrics from a background thread."""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                payload = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return server
+
+
+def init_tracer():
+    """Return an OpenTelemetry tracer, or None if the opentelemetry packages are not installed.
+
+    Spans go to the OTLP exporter when opentelemetry-exporter-otlp is installed (configured through
+    the standard OTEL_EXPORTER_OTLP_* environment variables), otherwise to the console.
+    """
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        logger.warning("ENABLE_TRACING is set but opentelemetry-sdk is not installed; tracing disabled.")
+        return None
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter()
+    except ImportError:
+        exporter = ConsoleSpanExporter()
+    provider = TracerProvider(resource=Resource.create({'service.name': TRACING_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return trace.get_tracer(__name__)
+
+
+metrics = MetricsRegistry()
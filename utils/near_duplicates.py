@@ -0,0 +1,157 @@
+import hashlib
+import os
+import pickle
+import random
+import re
+from array import array
+
+from loguru import logger
+
+from utils.config import SIMILARITY_THRESHOLD, NEAR_DUPLICATE_INDEX_FILE
+from utils.text import TAG_RE
+
+NUM_PERMUTATIONS = 64
+SHINGLE_SIZE = 3
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+WORD_RE = re.compile(r'\w+')
+
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    words = WORD_RE.findall(TAG_RE.sub(' ', text).lower())
+    if len(words) < size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def choose_bands(num_permutations, threshold):
+    """Pick the (bands, rows) split whose LSH threshold (1/b)^(1/r) is closest to, but not above, `threshold`."""
+    best = (num_permutations, 1)
+    best_distance = None
+    for rows in range(1, num_permutations + 1):
+        if num_permutations % rows:
+            continue
+        bands = num_permutations // rows
+        lsh_threshold = (1.0 / bands) ** (1.0 / rows)
+        if lsh_threshold > threshold:
+            continue
+        distance = threshold - lsh_threshold
+        if best_distance is None or distance < best_distance:
+            best, best_distance = (bands, rows), distance
+    return best
+
+
+class MinHasher:
+    def __init__(self, num_permutations=NUM_PERMUTATIONS, seed=1):
+        rng = random.Random(seed)
+        self.num_permutations = num_permutations
+        self.params = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_permutations)]
+
+    def signature(self, text):
+        hashes = [_hash64(shingle.encode('utf-8')) for shingle in shingles(text)]
+        if not hashes:
+            return None
+        return array('Q', (
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self.params
+        ))
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index over canonical articles. Lookups only compare against
+    articles sharing at least one LSH band, so cost does not grow with the archive.
+
+    With `max_entries` set, only the most recently added articles are kept (oldest evicted first),
+    which bounds memory at the cost of missing duplicates of older stories.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, num_permutations=NUM_PERMUTATIONS, max_entries=None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hasher = MinHasher(num_permutations)
+        self.bands, self.rows = choose_bands(num_permutations, threshold)
+        self.buckets = [{} for _ in range(self.bands)]
+        self.signatures = {}
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows]
+            yield band, _hash64(chunk.tobytes())
+
+    def find_duplicate(self, signature):
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self.buckets[band].get(key, ()))
+
+        best_url, best_score = None, 0.0
+        for url in candidates:
+            other = self.signatures[url]
+            score = sum(1 for x, y in zip(signature, other) if x == y) / len(signature)
+            if score > best_score:
+                best_url, best_score = url, score
+        return best_url if best_score >= self.threshold else None
+
+    def add(self, url, signature):
+        self.signatures[url] = signature
+        for band, key in self._band_keys(signature):
+            self.buckets[band].setdefault(key, []).append(url)
+        if self.max_entries is not None:
+            while len(self.signatures) > self.max_entries:
+                self.evict(next(iter(self.signatures)))
+
+    def evict(self, url):
+        signature = self.signatures.pop(url)
+        for band, key in self._band_keys(signature):
+            bucket = self.buckets[band][key]
+            bucket.remove(url)
+            if not bucket:
+                del self.buckets[band][key]
+
+    def check_and_add(self, url, text):
+        """Return the canonical URL if `text` near-duplicates an indexed article, otherwise index it and return None."""
+        if url in self.signatures:
+            return None
+        signature = self.hasher.signature(text)
+        if signature is None:
+            return None
+        canonical = self.find_duplicate(signature)
+        if canonical is None:
+            self.add(url, signature)
+        return canonical
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def save(self, path=NEAR_DUPLICATE_INDEX_FILE):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'num_permutations': self.hasher.num_permutations, 'signatures': self.signatures},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load_or_build(cls, articles=(), path=NEAR_DUPLICATE_INDEX_FILE, max_entries=None):
+        """Load the persisted index, or build it from `articles` (dicts with url/title/content) on first use."""
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    state = pickle.load(f)
+                index = cls(num_permutations=state['num_permutations'], max_entries=max_entries)
+                for url, signature in state['signatures'].items():
+                    index.add(url, signature)
+                logger.info(f"Loaded near-duplicate index with {len(index)} articles from {path}")
+                return index
+            except (OSError, pickle.UnpicklingError, KeyError, EOFError) as e:
+                logger.error(f"Error loading near-duplicate index {path}: {str(e)}. Rebuilding.")
+
+        index = cls(max_entries=max_entries)
+        for article in articles:
+            if not article.get('duplicate_of'):
+                index.check_and_add(article['url'], f"{article.get('title', '')} {article.get('content') or ''}")
+        logger.info(f"Built near-duplicate index with {len(index)} articles")
+        return index
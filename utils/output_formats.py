@@ -0,0 +1,448 @@
+import gzip
+import json
+import os
+from datetime import datetime
+from itertools import islice
+
+from loguru import logger
+
+from utils.config import REPORT_FORMAT, REPORT_ROW_GROUP_SIZE, REPORT_COMPRESSION_LEVEL, PARQUET_COMPRESSION
+
+# Report keys holding article arrays; everything else (counts, windows, trending) is report metadata
+ARTICLE_SECTIONS = ('new_articles', 'old_articles', 'articles')
+DATE_COLUMN = 'published_date'
+SOURCE_COLUMN = 'source'
+SECTION_COLUMN = '_section'  # Parquet only: the report section each row belongs to
+MAX_GROUP_SOURCES = 64  # Row groups with more distinct sources than this are not skipped by source
+
+
+def batched(items, size):
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class StreamedArray(list):
+    """Wraps an iterator so json.dump writes it as an array item by item, without building the list."""
+
+    def __init__(self, items):
+        super().__init__()
+        self.items = iter(items)
+        self.head = next(self.items, None)  # json.dump needs to know whether the array is empty
+
+    def __iter__(self):
+        if self.head is not None:
+            yield self.head
+            yield from self.items
+
+    def __bool__(self):
+        return self.head is not None
+
+
+def iso(value):
+    # Dates are compared as ISO 8601 strings, which sort chronologically
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def split_report(report):
+    """Return (metadata, {section: rows}) with the article arrays of `report` taken out of the metadata.
+
+    Sections stay in the metadata as None placeholders so a reader can restore the key order.
+    """
+    metadata = {}
+    sections = {}
+    for key, value in report.items():
+        if key in ARTICLE_SECTIONS and isinstance(value, list):
+            sections[key] = value
+            metadata[key] = None
+        else:
+            metadata[key] = value
+    return metadata, sections
+
+
+def join_report(metadata, sections):
+    return {key: sections.get(key, []) if key in sections else value for key, value in metadata.items()}
+
+
+def row_matches(row, since, until, sources):
+    if since is not None or until is not None:
+        date = row.get(DATE_COLUMN)
+        if date is None or (since is not None and date < since) or (until is not None and date >= until):
+            return False
+    return sources is None or row.get(SOURCE_COLUMN) in sources
+
+
+def project(row, columns):
+    return row if columns is None else {column: row.get(column) for column in columns}
+
+
+class OutputFormat:
+    """Writes reports and archives (a dict of metadata plus article arrays) and reads them back.
+
+    `read` yields the articles of a file, optionally only some `columns` and only those whose
+    published_date lies in [since, until) and whose source is one of `sources`; formats that can
+    skip data which cannot match (pushdown) do so.
+    """
+    name = 'base'
+    extension = ''
+
+    def write(self, path, report):
+        raise NotImplementedError
+
+    def load(self, path):
+        """Return the whole report as it was written."""
+        raise NotImplementedError
+
+    def read(self, path, columns=None, since=None, until=None, sources=None, sections=None):
+        raise NotImplementedError
+
+    def paths(self, path):
+        """Files making up the output at `path`."""
+        return [path]
+
+
+class JsonFormat(OutputFormat):
+    """Pretty-printed JSON, the original report format. Every read parses the whole file."""
+    name = 'json'
+    extension = '.json'
+
+    def write(self, path, report):
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    def load(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def read(self, path, columns=None, since=None, until=None, sources=None, sections=None):
+        since, until = iso(since), iso(until)
+        sources = set(sources) if sources else None
+        report = self.load(path)
+        if isinstance(report, list):  # A legacy article array such as all_articles.json
+            report = {'articles': report}
+        _, report_sections = split_report(report)
+        for section, rows in report_sections.items():
+            if sections and section not in sections:
+                continue
+            for row in rows:
+                if row_matches(row, since, until, sources):
+                    yield project(row, columns)
+
+
+class ColumnarJsonlFormat(OutputFormat):
+    """gzip-compressed, column-oriented JSON lines with an offset index.
+
+    The file is a series of gzip members, each holding one JSON line: a header with the report
+    metadata, then for every row group of up to `row_group_size` articles one line per column,
+    {"type": "column", "group": g, "section": s, "column": c, "values": [...]}. Concatenated gzip
+    members are a valid gzip stream, so `zcat report.jsonl.gz` still works.
+
+    The sidecar index (.idx.json) records the byte range of every member and, per row group, its
+    section, row count and the range of published dates and set of sources. Readers seek straight
+    to the members they need: row groups that cannot match the date/source predicates are skipped
+    unread, the date and source columns are decoded before any other column, and only the
+    requested columns are decompressed. Without the index the file is scanned sequentially.
+    """
+    name = 'jsonl.gz'
+    extension = '.jsonl.gz'
+    version = 1
+
+    def __init__(self, row_group_size=REPORT_ROW_GROUP_SIZE, compresslevel=REPORT_COMPRESSION_LEVEL):
+        self.row_group_size = row_group_size
+        self.compresslevel = compresslevel
+
+    def index_path(self, path):
+        return path[:-len(self.extension)] + '.idx.json'
+
+    def paths(self, path):
+        return [path, self.index_path(path)]
+
+    def write(self, path, report):
+        metadata, sections = split_report(report)
+        index = {'format': self.name, 'version': self.version, 'sections': list(sections), 'groups': []}
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            index['header'] = self._write_member(f, {'type': 'header', 'report': metadata, 'sections': list(sections)})
+            for section, rows in sections.items():
+                for group in batched(rows, self.row_group_size):
+                    index['groups'].append(self._write_group(f, len(index['groups']), section, group))
+            index['size'] = f.tell()
+        os.replace(tmp_path, path)
+        # Written after the data, so an index always describes a complete file
+        index_tmp_path = f"{self.index_path(path)}.{os.getpid()}.tmp"
+        with open(index_tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(index_tmp_path, self.index_path(path))
+
+    def _write_member(self, f, record):
+        data = gzip.compress((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'),
+                             compresslevel=self.compresslevel, mtime=0)
+        offset = f.tell()
+        f.write(data)
+        return [offset, len(data)]
+
+    def _write_group(self, f, number, section, rows):
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        dates = [row[DATE_COLUMN] for row in rows if row.get(DATE_COLUMN) is not None]
+        sources = {row.get(SOURCE_COLUMN) for row in rows}
+        group = {
+            'section': section,
+            'rows': len(rows),
+            'min_date': min(dates) if dates else None,
+            'max_date': max(dates) if dates else None,
+            'sources': sorted(sources, key=str) if len(sources) <= MAX_GROUP_SOURCES else None,
+            'columns': {},
+        }
+        for column in columns:
+            group['columns'][column] = self._write_member(f, {
+                'type': 'column', 'group': number, 'section': section, 'column': column,
+                'values': [row.get(column) for row in rows],
+            })
+        return group
+
+    def _load_index(self, path):
+        try:
+            with open(self.index_path(path), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if index.get('format') != self.name or index.get('version') != self.version:
+            return None
+        if index.get('size') != os.path.getsize(path):
+            return None  # Left over from an earlier file at the same path
+        return index
+
+    @staticmethod
+    def _read_member(f, location):
+        offset, length = location
+        f.seek(offset)
+        return json.loads(gzip.decompress(f.read(length)))
+
+    def _scan(self, path):
+        """(header, groups) read sequentially, for files whose index is missing or stale."""
+        header = None
+        groups = {}
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                if record['type'] == 'header':
+                    header = record
+                else:
+                    group = groups.setdefault(record['group'], {'section': record['section'], 'values': {}})
+                    group['values'][record['column']] = record['values']
+        return header, [groups[number] for number in sorted(groups)]
+
+    def load(self, path):
+        index = self._load_index(path)
+        if index is None:
+            header, groups = self._scan(path)
+            sections = {section: [] for section in header['sections']}
+            for group in groups:
+                names = list(group['values'])
+                sections[group['section']].extend(dict(zip(names, row)) for row in zip(*group['values'].values()))
+        else:
+            with open(path, 'rb') as f:
+                header = self._read_member(f, index['header'])
+            sections = {section: list(self.read(path, sections=[section])) for section in header['sections']}
+        return join_report(header['report'], sections)
+
+    def read(self, path, columns=None, since=None, until=None, sources=None, sections=None):
+        since, until = iso(since), iso(until)
+        sources = set(sources) if sources else None
+        index = self._load_index(path)
+        if index is None:
+            logger.warning(f"No usable index for {path}; scanning the whole file")
+            yield from self._read_scanned(path, columns, since, until, sources, sections)
+            return
+
+        with open(path, 'rb') as f:
+            for group in index['groups']:
+                if not self._may_match(group, since, until, sources, sections):
+                    continue
+                values = {}
+
+                def column_values(column):
+                    if column not in values:
+                        location = group['columns'].get(column)
+                        values[column] = self._read_member(f, location)['values'] if location else [None] * group['rows']
+                    return values[column]
+
+                selected = range(group['rows'])
+                if since is not None or until is not None:
+                    dates = column_values(DATE_COLUMN)
+                    selected = [i for i in selected if dates[i] is not None
+                                and (since is None or dates[i] >= since) and (until is None or dates[i] < until)]
+                if sources is not None:
+                    row_sources = column_values(SOURCE_COLUMN)
+                    selected = [i for i in selected if row_sources[i] in sources]
+                if not selected:
+                    continue
+                wanted = columns if columns is not None else list(group['columns'])
+                data = [column_values(column) for column in wanted]
+                if len(selected) < group['rows']:
+                    data = [[column_data[i] for i in selected] for column_data in data]
+                for row in zip(*data):
+                    yield dict(zip(wanted, row))
+
+    @staticmethod
+    def _may_match(group, since, until, sources, sections):
+        if sections and group['section'] not in sections:
+            return False
+        if since is not None or until is not None:
+            if group['min_date'] is None:
+                return False
+            if since is not None and group['max_date'] < since:
+                return False
+            if until is not None and group['min_date'] >= until:
+                return False
+        if sources is not None and group['sources'] is not None and not sources.intersection(group['sources']):
+            return False
+        return True
+
+    def _read_scanned(self, path, columns, since, until, sources, sections):
+        _, groups = self._scan(path)
+        for group in groups:
+            if sections and group['section'] not in sections:
+                continue
+            names = list(group['values'])
+            for row in zip(*group['values'].values()):
+                row = dict(zip(names, row))
+                if row_matches(row, since, until, sources):
+                    yield project(row, columns)
+
+
+class ParquetFormat(OutputFormat):
+    """Apache Parquet through pyarrow: columnar, compressed (PARQUET_COMPRESSION), with row group
+    statistics that pyarrow uses to skip row groups for date/source filters. The report metadata
+    is stored as JSON in the file's key-value metadata.
+
+    All sections share one schema, the union of the columns of each section's first row, and
+    each section's own columns are kept in the metadata so rows read back have the same keys as
+    the rows written (a section without `content` does not come back with content: None).
+    """
+    name = 'parquet'
+    extension = '.parquet'
+    column_types = {'id': 'int64', 'processed_seq': 'int64', 'keywords': 'list', 'processed': 'bool'}
+    value_types = ((bool, 'bool'), (int, 'int64'), (float, 'float64'), (list, 'list'))  # Other columns, from their first value
+
+    def __init__(self, row_group_size=REPORT_ROW_GROUP_SIZE, compression=PARQUET_COMPRESSION):
+        import pyarrow  # Optional dependency, only needed for this format
+        import pyarrow.parquet
+
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.row_group_size = row_group_size
+        self.compression = compression
+
+    def column_type(self, column, first_rows):
+        if column in self.column_types:
+            return self.column_types[column]
+        value = next((row[column] for row in first_rows if row and row.get(column) is not None), None)
+        return next((name for value_type, name in self.value_types if isinstance(value, value_type)), 'string')
+
+    def schema_for(self, first_rows, metadata):
+        types = {'int64': self.pa.int64(), 'float64': self.pa.float64(), 'bool': self.pa.bool_(),
+                 'list': self.pa.list_(self.pa.string()), 'string': self.pa.string()}
+        columns = list(dict.fromkeys(column for row in first_rows if row for column in row))
+        fields = [self.pa.field(SECTION_COLUMN, self.pa.string())]
+        fields += [self.pa.field(column, types[self.column_type(column, first_rows)]) for column in columns]
+        return self.pa.schema(fields, metadata={'report': json.dumps(metadata)})
+
+    def write(self, path, report):
+        metadata, sections = split_report(report)
+        # A streamed section's first row is known before it is consumed
+        first_rows = {section: rows.head if isinstance(rows, StreamedArray) else (rows[0] if rows else None)
+                      for section, rows in sections.items()}
+        section_columns = {section: list(row or {}) for section, row in first_rows.items()}
+        metadata = {'report': metadata, 'sections': list(sections), 'section_columns': section_columns}
+        schema = self.schema_for(list(first_rows.values()), metadata)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with self.pq.ParquetWriter(tmp_path, schema, compression=self.compression) as writer:
+            for section, rows in sections.items():
+                for group in batched(rows, self.row_group_size):
+                    table = self.pa.Table.from_pylist([{**row, SECTION_COLUMN: section} for row in group], schema=writer.schema)
+                    writer.write_table(table, row_group_size=self.row_group_size)
+        os.replace(tmp_path, path)
+
+    def _metadata(self, path):
+        return json.loads(self.pq.read_schema(path).metadata[b'report'])
+
+    def load(self, path):
+        metadata = self._metadata(path)
+        sections = {section: list(self.read(path, sections=[section])) for section in metadata['sections']}
+        return join_report(metadata['report'], sections)
+
+    def read(self, path, columns=None, since=None, until=None, sources=None, sections=None):
+        since, until = iso(since), iso(until)
+        schema = self.pq.read_schema(path)
+        available = schema.names
+        if (since is not None or until is not None) and DATE_COLUMN not in available:
+            return  # As in the other formats, rows without a date never match a date filter
+        if sources and SOURCE_COLUMN not in available:
+            return
+        filters = []
+        if since is not None:
+            filters.append((DATE_COLUMN, '>=', since))
+        if until is not None:
+            filters.append((DATE_COLUMN, '<', until))
+        if sources:
+            filters.append((SOURCE_COLUMN, 'in', list(sources)))
+        if sections:
+            filters.append((SECTION_COLUMN, 'in', list(sections)))
+        if columns is not None:
+            table = self.pq.read_table(path, columns=[column for column in columns if column in available],
+                                       filters=filters or None)
+            for row in table.to_pylist():
+                yield project(row, columns)
+            return
+        section_columns = json.loads(schema.metadata[b'report']).get('section_columns')
+        if section_columns is None:  # Written before section columns were recorded
+            for row in self.pq.read_table(path, columns=[column for column in available if column != SECTION_COLUMN],
+                                          filters=filters or None).to_pylist():
+                yield row
+            return
+        for row in self.pq.read_table(path, filters=filters or None).to_pylist():
+            yield project(row, section_columns[row[SECTION_COLUMN]])
+
+
+OUTPUT_FORMATS = {
+    JsonFormat.name: JsonFormat,
+    ColumnarJsonlFormat.name: ColumnarJsonlFormat,
+    ParquetFormat.name: ParquetFormat,
+}
+
+
+def get_output_format(name=REPORT_FORMAT):
+    """Instantiate an output format; one whose dependency is missing falls back to JSON."""
+    if name not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{name}'. Available: {', '.join(OUTPUT_FORMATS)}")
+    try:
+        return OUTPUT_FORMATS[name]()
+    except ImportError as e:
+        logger.warning(f"Output format '{name}' unavailable ({str(e)}); writing JSON instead")
+        return JsonFormat()
+
+
+def format_for_path(path):
+    # Longest extension first, so ".jsonl.gz" is not mistaken for something else
+    for output_format in sorted(OUTPUT_FORMATS.values(), key=lambda cls: len(cls.extension), reverse=True):
+        if path.endswith(output_format.extension):
+            return output_format()
+    raise ValueError(f"Unrecognised report/archive file: {path}")
+
+
+def is_output_file(path):
+    return any(path.endswith(cls.extension) for cls in OUTPUT_FORMATS.values()) and not path.endswith('.idx.json')
+
+
+def load_report(path):
+    return format_for_path(path).load(path)
+
+
+def read_articles(path, columns=None, since=None, until=None, sources=None, sections=None):
+    """Articles of a report or archive in any output format; see OutputFormat.read."""
+    return format_for_path(path).read(path, columns=columns, since=since, until=until, sources=sources,
+                                      sections=sections)
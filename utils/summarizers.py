@@ -0,0 +1,278 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+from utils.lazy import lazy_import
+from utils.metrics import metrics
+from utils.text import plain_text
+
+from utils.config import (
+    SUMMARY_LENGTH,
+    SUMMARY_BACKEND,
+    SUMMARY_FALLBACK_BACKEND,
+    SUMMARY_WORKERS,
+    SUMMARY_REQUESTS_PER_MINUTE,
+    SUMMARY_TOKENS_PER_MINUTE,
+    MAX_RETRIES,
+    RETRY_DELAY,
+    OPENAI_API_KEY,
+    OPENAI_API_BASE,
+)
+
+openai = lazy_import('openai')  # Imported (with aiohttp) on the first request
+
+
+def truncate_summary(summary):
+    return summary[:SUMMARY_LENGTH] + "..." if len(summary) > SUMMARY_LENGTH else summary
+
+
+class SummarizerBackend:
+    name = 'base'
+    rate_limited = False  # Whether requests count against the per-minute request/token budgets
+
+    @property
+    def cache_model(self):
+        """Model identifier used in summary cache keys."""
+        return self.name
+
+    @property
+    def cache_prompt(self):
+        """Prompt identifier used in summary cache keys."""
+        return ''
+
+    def summarize(self, text):
+        raise NotImplementedError
+
+    def estimate_tokens(self, text):
+        return 0
+
+    def is_retryable(self, error):
+        return False
+
+
+class OpenAISummarizer(SummarizerBackend):
+    name = 'openai'
+    rate_limited = True
+    model = "gpt-3.5-turbo"
+    system_prompt = "You are a helpful assistant that summarizes text."
+    prompt_template = "Please summarize the following text in about {length} characters:\n\n{text}"
+
+    def __init__(self, api_key=OPENAI_API_KEY, api_base=OPENAI_API_BASE):
+        # Passed with each request instead of set on the openai module, so constructing the backend
+        # does not import openai; None falls back to the module settings
+        self.api_key = api_key
+        self.api_base = api_base
+
+    @property
+    def cache_model(self):
+        return self.model
+
+    @property
+    def cache_prompt(self):
+        return self.system_prompt + self.prompt_template
+
+    def summarize(self, text):
+        response = openai.ChatCompletion.create(
+            api_key=self.api_key,
+            api_base=self.api_base,
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": self.prompt_template.format(length=SUMMARY_LENGTH, text=text)}
+            ],
+            max_tokens=SUMMARY_LENGTH // 4,  # Approximate token count
+            n=1,
+            stop=None,
+            temperature=0.7,
+        )
+        return response.choices[0].message['content'].strip()
+
+    def estimate_tokens(self, text):
+        # Roughly four characters per token for the prompt, plus the completion budget
+        return (len(text) + len(self.prompt_template) + len(self.system_prompt)) // 4 + SUMMARY_LENGTH // 4
+
+    def is_retryable(self, error):
+        return isinstance(error, (
+            openai.error.RateLimitError,
+            openai.error.APIError,
+            openai.error.Timeout,
+            openai.error.APIConnectionError,
+            openai.error.ServiceUnavailableError,
+        ))
+
+
+class LsaSummarizerBackend(SummarizerBackend):
+    """Local extractive summaries using sumy's LSA summarizer."""
+    name = 'lsa'
+    sentence_count = 2
+
+    def __init__(self):
+        from sumy.nlp.stemmers import Stemmer
+        from sumy.nlp.tokenizers import Tokenizer
+        from sumy.parsers.plaintext import PlaintextParser
+        from sumy.summarizers.lsa import LsaSummarizer
+        from sumy.utils import get_stop_words
+
+        self._parser_class = PlaintextParser
+        self._tokenizer = Tokenizer('english')
+        self._summarizer = LsaSummarizer(Stemmer('english'))
+        self._summarizer.stop_words = get_stop_words('english')
+        self._lock = threading.Lock()
+
+    def summarize(self, text):
+        parser = self._parser_class.from_string(plain_text(text), self._tokenizer)
+        with self._lock:
+            sentences = self._summarizer(parser.document, self.sentence_count)
+        return ' '.join(str(sentence) for sentence in sentences)
+
+
+class StubSummarizer(SummarizerBackend):
+    """Deterministic offline backend for benchmarks: returns the leading text after an optional fixed delay."""
+    name = 'stub'
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def summarize(self, text):
+        if self.latency:
+            time.sleep(self.latency)
+        return plain_text(text)[:SUMMARY_LENGTH]
+
+
+BACKENDS = {
+    OpenAISummarizer.name: OpenAISummarizer,
+    LsaSummarizerBackend.name: LsaSummarizerBackend,
+    StubSummarizer.name: StubSummarizer,
+}
+
+
+def get_backend(name):
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown summarizer backend '{name}'. Available: {', '.join(BACKENDS)}")
+
+
+class TokenBucket:
+    """Blocking token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute):
+        self.capacity = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self.tokens = float(rate_per_minute)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        if not self.capacity:
+            return
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SummarizationPipeline:
+    """Summarizes texts on a bounded worker pool with request/token rate limits,
+    retries with exponential backoff, caching and per-item error isolation."""
+
+    def __init__(self, backend=None, cache=None, fallback=None, workers=SUMMARY_WORKERS,
+                 requests_per_minute=SUMMARY_REQUESTS_PER_MINUTE, tokens_per_minute=SUMMARY_TOKENS_PER_MINUTE,
+                 max_retries=MAX_RETRIES, retry_delay=RETRY_DELAY):
+        self.backend = backend or get_backend(SUMMARY_BACKEND)
+        self._fallback = fallback
+        # The configured fallback (sumy/nltk for "lsa") is only built once a summary actually fails
+        self._fallback_name = None
+        if fallback is None and SUMMARY_FALLBACK_BACKEND and SUMMARY_FALLBACK_BACKEND != self.backend.name:
+            self._fallback_name = SUMMARY_FALLBACK_BACKEND
+        self._fallback_lock = threading.Lock()
+        self.cache = cache
+        self.workers = workers
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+    @property
+    def fallback(self):
+        if self._fallback_name is not None:
+            with self._fallback_lock:
+                if self._fallback_name is not None:
+                    try:
+                        self._fallback = get_backend(self._fallback_name)
+                    except Exception as e:  # e.g. sumy or its NLTK data missing; failed summaries are reported as such
+                        logger.warning(f"Fallback summarizer '{self._fallback_name}' unavailable: {str(e)}")
+                    self._fallback_name = None
+        return self._fallback
+
+    def summarize(self, text):
+        """Return the summary of `text`, or None when neither the backend nor the fallback produced one."""
+        text = text or ''
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(text, self.backend.cache_model, self.backend.cache_prompt, SUMMARY_LENGTH)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                metrics.inc('summaries_total', backend=self.backend.name, outcome='cache_hit')
+                return cached
+
+        try:
+            summary = truncate_summary(self._call_with_retries(text))
+        except Exception as e:
+            logger.error(f"Error generating summary using {self.backend.name}: {str(e)}")
+            return self._fallback_summary(text)
+
+        metrics.inc('summaries_total', backend=self.backend.name, outcome='ok')
+        if cache_key is not None:
+            self.cache.set(cache_key, summary)
+        return summary
+
+    def summarize_many(self, texts):
+        """Summarize `texts` concurrently, preserving order. A failing item (None) never affects the others."""
+        texts = list(texts)
+        if len(texts) <= 1 or self.workers <= 1:
+            return [self.summarize(text) for text in texts]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(self.summarize, texts))
+
+    def _call_with_retries(self, text):
+        attempt = 0
+        while True:
+            if self.backend.rate_limited:
+                self.request_bucket.acquire()
+                self.token_bucket.acquire(self.backend.estimate_tokens(text))
+            try:
+                with metrics.span('summarizer_request', backend=self.backend.name):
+                    return self.backend.summarize(text)
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries or not self.backend.is_retryable(e):
+                    raise
+                delay = self.retry_delay * (2 ** (attempt - 1)) * (1 + random.random() * 0.1)
+                logger.warning(f"{self.backend.name} summarizer error ({str(e)}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _fallback_summary(self, text):
+        fallback = self.fallback
+        if fallback is None:
+            metrics.inc('summaries_total', backend=self.backend.name, outcome='failed')
+            return None
+        try:
+            with metrics.span('summarizer_request', backend=fallback.name):
+                summary = truncate_summary(fallback.summarize(text))
+            metrics.inc('summaries_total', backend=self.backend.name, outcome='fallback')
+            return summary
+        except Exception as e:
+            logger.error(f"Error generating summary using fallback {fallback.name}: {str(e)}")
+            metrics.inc('summaries_total', backend=self.backend.name, outcome='failed')
+            return None
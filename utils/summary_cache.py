@@ -0,0 +1,86 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+from loguru import logger
+
+from utils.config import SUMMARY_CACHE_FILE, SUMMARY_CACHE_TTL, SUMMARY_CACHE_MAX_ENTRIES
+
+
+class SummaryCache:
+    """Content-addressed summary cache stored in SQLite, safe to share between runs and processes.
+
+    Entries expire after `ttl` seconds; once the cache holds more than `max_entries`
+    the least recently used entries are evicted.
+    """
+
+    def __init__(self, path=SUMMARY_CACHE_FILE, ttl=SUMMARY_CACHE_TTL, max_entries=SUMMARY_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "key TEXT PRIMARY KEY, summary TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS ix_summaries_accessed_at ON summaries (accessed_at)")
+
+    @staticmethod
+    def make_key(text, model, prompt_template, summary_length):
+        payload = '\x1f'.join([model, prompt_template, str(summary_length), text])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT summary, created_at FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            self._connection.execute("UPDATE summaries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, summary):
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, summary, now, now),
+            )
+
+    def evict(self):
+        """Drop expired entries and trim the cache to `max_entries`, least recently used first."""
+        with self._lock:
+            if self.ttl:
+                self._connection.execute("DELETE FROM summaries WHERE created_at < ?", (time.time() - self.ttl,))
+            if self.max_entries:
+                self._connection.execute(
+                    "DELETE FROM summaries WHERE key IN ("
+                    "SELECT key FROM summaries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        logger.info(f"Summary cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
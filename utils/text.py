@@ -0,0 +1,9 @@
+import re
+
+TAG_RE = re.compile(r'<[^>]+>')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def plain_text(text):
+    """`text` with HTML tags removed and runs of whitespace collapsed to single spaces."""
+    return WHITESPACE_RE.sub(' ', TAG_RE.sub(' ', text or '')).strip()
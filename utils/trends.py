@@ -0,0 +1,212 @@
+import math
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+
+from loguru import logger
+
+from database.trend_storage import TrendStorage
+from utils.lazy import lazy_import, module_available
+from utils.config import (
+    KEYWORD_RSS_FEEDS,
+    TREND_WINDOW_HOURS,
+    TREND_BASELINE_DAYS,
+    TREND_SPIKE_THRESHOLD,
+    TREND_MIN_COUNT,
+    STORY_SIMILARITY_THRESHOLD,
+    STORY_WINDOW_HOURS,
+    STORY_MAX_ACTIVE,
+    STORY_VECTOR_SIZE,
+    TRENDING_STORIES_LIMIT,
+)
+
+np = lazy_import('numpy')  # Optional; without it keyword/topic trends are tracked but stories are not
+
+TOPICS = [feed['keyword'] for feed in KEYWORD_RSS_FEEDS]
+TITLE_WEIGHT = 2.0  # Title terms count this many times their IDF in the story vectors
+SYNC_SLACK = timedelta(seconds=5)  # Re-read stories written slightly before the last sync (clock skew between processes)
+
+
+def hour_bucket(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def article_topics(article):
+    """KEYWORD_RSS_FEEDS topics the article came from or mentions."""
+    text = f"{article.get('title', '')} {article.get('content') or ''}".lower()
+    return [topic for topic in TOPICS if article.get('source') == topic or topic.lower() in text]
+
+
+def detect_spikes(totals, window_hours=TREND_WINDOW_HOURS, baseline_hours=TREND_BASELINE_DAYS * 24,
+                  threshold=TREND_SPIKE_THRESHOLD, min_count=TREND_MIN_COUNT):
+    """Score each term's recent count against the rate its baseline predicts for the window.
+
+    `totals` maps (kind, term) to (baseline count, recent count). The score is a Poisson-style
+    z-score, (recent - expected) / sqrt(expected + 1); terms at or above `threshold` with at least
+    `min_count` recent mentions are returned, highest score first.
+    """
+    spikes = []
+    for (kind, term), (baseline, recent) in totals.items():
+        if recent < min_count:
+            continue
+        expected = baseline * window_hours / baseline_hours
+        score = (recent - expected) / math.sqrt(expected + 1)
+        if score >= threshold:
+            spikes.append({'kind': kind, 'term': term, 'count': recent, 'expected': round(expected, 2),
+                           'score': round(score, 2)})
+    spikes.sort(key=lambda spike: spike['score'], reverse=True)
+    return spikes
+
+
+def trending_section(storage=None, now=None):
+    """The report's "trending" section, read from the pre-aggregated counts and stories."""
+    storage = storage or TrendStorage()
+    now = now or datetime.now()
+    window_start = now - timedelta(hours=TREND_WINDOW_HOURS)
+    baseline_start = window_start - timedelta(days=TREND_BASELINE_DAYS)
+    totals = storage.term_totals(baseline_start, window_start, now)
+    spikes = detect_spikes(totals)
+    topics = []
+    for topic in TOPICS:
+        baseline, recent = totals.get(('topic', topic), (0, 0))
+        expected = baseline * TREND_WINDOW_HOURS / (TREND_BASELINE_DAYS * 24)
+        topics.append({'topic': topic, 'count': recent, 'expected': round(expected, 2),
+                       'spiking': any(spike['kind'] == 'topic' and spike['term'] == topic for spike in spikes)})
+    return {
+        "window_start": window_start.isoformat(),
+        "baseline_start": baseline_start.isoformat(),
+        "stories": storage.trending_stories(window_start, now, TRENDING_STORIES_LIMIT),
+        "spiking_keywords": [spike for spike in spikes if spike['kind'] == 'keyword'][:TRENDING_STORIES_LIMIT],
+        "topics": topics,
+    }
+
+
+class StoryClusterer:
+    """Single-pass clustering of articles into stories on hashed, L2-normalised TF-IDF vectors.
+
+    Each article joins the most similar open story (cosine similarity of its vector with the
+    story centroid, computed for a whole batch with one matrix product) or starts a new one.
+    Only stories seen in the last STORY_WINDOW_HOURS stay open, so the work per batch does not
+    depend on the size of the archive. Stories are shared between processes through the database.
+    """
+
+    def __init__(self, storage, threshold=STORY_SIMILARITY_THRESHOLD, size=STORY_VECTOR_SIZE):
+        self.storage = storage
+        self.threshold = threshold
+        self.size = size
+        self.active = {}  # story id -> story dict with a float32 `vector` (centroid sum)
+        self.synced_at = None
+
+    def vectorize(self, weights, title_terms, idf):
+        # crc32 rather than hash(): the vectors are compared across processes and runs
+        vector = np.zeros(self.size, dtype=np.float32)
+        for term, weight in weights.items():
+            vector[zlib.crc32(term.encode('utf-8')) % self.size] += weight
+        for term in set(title_terms):
+            vector[zlib.crc32(term.encode('utf-8')) % self.size] += TITLE_WEIGHT * idf(term)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def refresh(self, now):
+        """Pick up stories written by other processes and close the ones that went quiet."""
+        open_after = now - timedelta(hours=STORY_WINDOW_HOURS)
+        synced_at = datetime.now()
+        updated_after = self.synced_at - SYNC_SLACK if self.synced_at else datetime.min
+        for story in self.storage.stories_updated_since(updated_after, open_after):
+            story['vector'] = np.frombuffer(story.pop('centroid'), dtype=np.float32).copy()
+            story['keywords'] = Counter(story['keywords'])
+            self.active[story['id']] = story
+        self.synced_at = synced_at
+        for story_id in [story_id for story_id, story in self.active.items() if story['last_seen'] < open_after]:
+            del self.active[story_id]
+        if len(self.active) > STORY_MAX_ACTIVE:
+            by_age = sorted(self.active, key=lambda story_id: self.active[story_id]['last_seen'])
+            for story_id in by_age[:len(self.active) - STORY_MAX_ACTIVE]:
+                del self.active[story_id]
+
+    def add_batch(self, articles, vectors, keywords):
+        """Assign each article with a vector to a story and store the changes. Returns the number of new stories."""
+        self.refresh(datetime.now())
+        rows = [i for i, vector in enumerate(vectors) if vector is not None]
+        if not rows:
+            return 0
+        batch = np.stack([vectors[i] for i in rows])
+        open_stories = list(self.active.values())
+        if open_stories:
+            centroids = np.stack([story['vector'] for story in open_stories])
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+            similarity = batch @ centroids.T
+        within_batch = batch @ batch.T
+        started = []  # (batch row, story) for stories started by this batch
+
+        changes = {}  # id(story) -> what this batch adds to the story, applied to the stored totals
+        assignments = []
+        for position, i in enumerate(rows):
+            article = articles[i]
+            story, best = None, self.threshold
+            if open_stories:
+                j = int(np.argmax(similarity[position]))
+                if similarity[position, j] >= best:
+                    story, best = open_stories[j], similarity[position, j]
+            for seed_position, seed_story in started:
+                if within_batch[position, seed_position] >= best:
+                    story, best = seed_story, within_batch[position, seed_position]
+            published = datetime.fromisoformat(article['published_date'])
+            if story is None:
+                story = {'id': None, 'title': article['title'], 'size': 0, 'first_seen': published, 'last_seen': published,
+                         'keywords': Counter(), 'sources': {}, 'vector': np.zeros(self.size, dtype=np.float32)}
+                started.append((position, story))
+            change = changes.setdefault(id(story), {
+                'story': story, 'size': 0, 'first_seen': published, 'last_seen': published,
+                'keywords': Counter(), 'sources': Counter(), 'vector': np.zeros(self.size, dtype=np.float32),
+            })
+            change['vector'] += batch[position]
+            change['size'] += 1
+            change['first_seen'] = min(change['first_seen'], published)
+            change['last_seen'] = max(change['last_seen'], published)
+            change['keywords'].update(keywords[i])
+            change['sources'][article['source']] += 1
+            assignments.append((article['id'], story))
+
+        # Updates the story dicts to the stored totals, including other processes' additions
+        self.storage.save_stories(list(changes.values()), assignments)
+        for change in changes.values():
+            self.active[change['story']['id']] = change['story']
+        return len(started)
+
+
+class TrendTracker:
+    """Updates hourly keyword/topic counts and story clusters from each analysed batch."""
+
+    def __init__(self, keyword_extractor, storage=None):
+        self.keyword_extractor = keyword_extractor
+        self.storage = storage or TrendStorage()
+        if not module_available('numpy'):
+            logger.warning("numpy is not installed; trend detection will not cluster articles into stories.")
+            self.clusterer = None
+        else:
+            self.clusterer = StoryClusterer(self.storage)
+
+    def add_batch(self, articles, term_weights, keywords):
+        """`articles` are article dicts, `term_weights` their {term: TF-IDF} maps and `keywords` their keyword lists."""
+        counts = Counter()
+        for article, article_keywords in zip(articles, keywords):
+            bucket = hour_bucket(article['published_date'])
+            for keyword in set(article_keywords):
+                counts[(bucket, 'keyword', keyword)] += 1
+            for topic in article_topics(article):
+                counts[(bucket, 'topic', topic)] += 1
+        self.storage.add_term_counts(counts)
+
+        if self.clusterer is None:
+            return
+        idf = self.keyword_extractor.corpus.idf
+        vectors = [
+            self.clusterer.vectorize(weights, self.keyword_extractor.tokenize(article.get('title')), idf)
+            for article, weights in zip(articles, term_weights)
+        ]
+        new_stories = self.clusterer.add_batch(articles, vectors, keywords)
+        if new_stories:
+            logger.info(f"Started {new_stories} new stories")
@@ -0,0 +1,139 @@
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from loguru import logger
+
+from database.models import Article
+
+TRACKING_PARAM_PREFIXES = ('utm_',)
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'yclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid',
+    '_hsenc', '_hsmi', 'ocid', 'cmpid', 'ref', 'ref_src', 'src', 'feature',
+}
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+
+def normalize_url(url):
+    """Canonical form used for deduplication: lowercased scheme/host, no default port,
+    no fragment, no tracking parameters, sorted query and no trailing slash."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    host, _, port = netloc.partition(':')
+    if port and DEFAULT_PORTS.get(scheme) == port:
+        netloc = host
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    ]
+    path = parts.path.rstrip('/')
+    return urlunsplit((scheme, netloc, path, urlencode(sorted(query)), ''))
+
+
+class UrlIndex:
+    """In-memory set of normalized article URLs with O(1) membership checks."""
+
+    def __init__(self, urls=()):
+        self._lock = threading.Lock()
+        self._urls = {normalize_url(url) for url in urls}
+
+    @classmethod
+    def build(cls, session, articles=()):
+        """Build the index from the `articles.url` column plus any additional article dicts."""
+        index = cls()
+        for (url,) in session.query(Article.url).yield_per(10000):
+            index._urls.add(normalize_url(url))
+        for article in articles:
+            index._urls.add(normalize_url(article['url']))
+        logger.info(f"Built URL dedup index with {len(index)} entries")
+        return index
+
+    def __contains__(self, url):
+        return normalize_url(url) in self._urls
+
+    def __len__(self):
+        return len(self._urls)
+
+    def add(self, url):
+        """Add `url` and return True if it was not already indexed."""
+        key = normalize_url(url)
+        with self._lock:
+            if key in self._urls:
+                return False
+            self._urls.add(key)
+            return True
+
+    def discard(self, url):
+        with self._lock:
+            self._urls.discard(normalize_url(url))
+
+    def mark_stored(self, urls):
+        pass  # Stored URLs stay in the set
+
+
+class DatabaseUrlIndex:
+    """UrlIndex replacement for streaming mode: membership is checked against the indexed
+    `articles.url_key` column, so memory does not grow with the archive.
+
+    Only URLs accepted but not yet stored are kept in memory; `mark_stored` drops them once saved.
+    """
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    @classmethod
+    def build(cls, session_factory, batch_size=10000):
+        """Fill in `url_key` for rows written before the column existed, then return the index."""
+        filled = 0
+        while True:
+            session = session_factory()
+            try:
+                rows = session.query(Article.id, Article.url).filter(Article.url_key.is_(None)).limit(batch_size).all()
+                if not rows:
+                    break
+                session.bulk_update_mappings(Article, [{'id': id, 'url_key': normalize_url(url)} for id, url in rows])
+                session.commit()
+                filled += len(rows)
+            finally:
+                session.close()
+        if filled:
+            logger.info(f"Backfilled normalized URLs for {filled} articles")
+        return cls(session_factory)
+
+    def _stored(self, key):
+        session = self.session_factory()
+        try:
+            return session.query(Article.id).filter(Article.url_key == key).first() is not None
+        finally:
+            session.close()
+
+    def __contains__(self, url):
+        key = normalize_url(url)
+        return key in self._pending or self._stored(key)
+
+    def __len__(self):
+        session = self.session_factory()
+        try:
+            return session.query(Article.id).count() + len(self._pending)
+        finally:
+            session.close()
+
+    def add(self, url):
+        """Add `url` and return True if it is neither stored nor pending."""
+        key = normalize_url(url)
+        with self._lock:
+            if key in self._pending or self._stored(key):
+                return False
+            self._pending.add(key)
+            return True
+
+    def discard(self, url):
+        with self._lock:
+            self._pending.discard(normalize_url(url))
+
+    def mark_stored(self, urls):
+        with self._lock:
+            self._pending.difference_update(normalize_url(url) for url in urls)
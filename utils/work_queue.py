@@ -0,0 +1,167 @@
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from loguru import logger
+from sqlalchemy import or_, select
+
+from database.models import Session, Article
+from utils.config import WORK_QUEUE_BACKEND, REDIS_URL, WORK_LEASE_SECONDS, BATCH_SIZE
+
+# `token` identifies one claim; a worker acknowledges or releases exactly the articles it was given
+Lease = namedtuple('Lease', ['token', 'article_ids'])
+
+
+class SqliteWorkQueue:
+    """Work queue backed by the articles table itself: every unprocessed, non-duplicate row is pending.
+
+    Claiming stamps rows with a lease token and expiry in one UPDATE, which SQLite serialises, so
+    concurrent workers never receive the same article. Rows whose lease expires (crashed or stuck
+    worker) become claimable again. Only usable by processes sharing the database file.
+    """
+
+    def __init__(self, session_factory=Session, lease_seconds=WORK_LEASE_SECONDS):
+        self.session_factory = session_factory
+        self.lease_seconds = lease_seconds
+
+    def enqueue_unprocessed(self, storage):
+        # Unprocessed rows are already the queue
+        return 0
+
+    def claim(self, worker_id, size=BATCH_SIZE):
+        now = datetime.now()
+        token = f"{worker_id}:{uuid.uuid4().hex[:12]}"[-64:]
+        session = self.session_factory()
+        try:
+            claimable = (
+                select(Article.id)
+                .where(Article.processed == False, Article.duplicate_of.is_(None))
+                .where(or_(Article.lease_expires.is_(None), Article.lease_expires < now))
+                .order_by(Article.id)
+                .limit(size)
+            )
+            session.query(Article).filter(Article.id.in_(claimable)).update(
+                {'lease_owner': token, 'lease_expires': now + timedelta(seconds=self.lease_seconds)},
+                synchronize_session=False,
+            )
+            session.commit()
+            ids = [article_id for (article_id,) in session.query(Article.id).filter(Article.lease_owner == token)]
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        return Lease(token, ids) if ids else None
+
+    def ack(self, lease):
+        """Finish a claim, or the articles of it listed in `lease.article_ids`, once their results are
+        stored. Results are keyed by article id, so writing them again after a lease expired and was
+        re-claimed is harmless."""
+        self._clear(lease)
+
+    def release(self, lease):
+        """Give up a claim so its articles can be picked up immediately."""
+        self._clear(lease)
+
+    def _clear(self, lease):
+        session = self.session_factory()
+        try:
+            session.query(Article).filter(Article.id.in_(lease.article_ids), Article.lease_owner == lease.token).update(
+                {'lease_owner': None, 'lease_expires': None}, synchronize_session=False
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+class RedisWorkQueue:
+    """Work queue in Redis (or any server speaking its protocol), shared by workers on many machines.
+
+    Pending article ids live in a list, claimed ids in a sorted set scored by lease expiry. Claims
+    return expired leases to the list first, all inside one Lua script so a crash never loses ids.
+    """
+
+    CLAIM_SCRIPT = """
+    local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+    for _, id in ipairs(expired) do
+        redis.call('ZREM', KEYS[2], id)
+        redis.call('RPUSH', KEYS[1], id)
+    end
+    local ids = {}
+    for i = 1, tonumber(ARGV[3]) do
+        local id = redis.call('RPOP', KEYS[1])
+        if not id then break end
+        redis.call('ZADD', KEYS[2], ARGV[2], id)
+        ids[#ids + 1] = id
+    end
+    return ids
+    """
+    ENQUEUE_SCRIPT = """
+    local added = 0
+    for _, id in ipairs(ARGV) do
+        if redis.call('SADD', KEYS[2], id) == 1 then
+            redis.call('LPUSH', KEYS[1], id)
+            added = added + 1
+        end
+    end
+    return added
+    """
+    RELEASE_SCRIPT = """
+    for _, id in ipairs(ARGV) do
+        if redis.call('ZREM', KEYS[2], id) == 1 then
+            redis.call('RPUSH', KEYS[1], id)
+        end
+    end
+    return 0
+    """
+
+    def __init__(self, url=REDIS_URL, lease_seconds=WORK_LEASE_SECONDS, prefix='analysis'):
+        import redis  # Optional dependency, only needed for this backend
+
+        self.client = redis.Redis.from_url(url)
+        self.lease_seconds = lease_seconds
+        self.keys = [f"{prefix}:pending", f"{prefix}:leases", f"{prefix}:queued"]
+        self._claim = self.client.register_script(self.CLAIM_SCRIPT)
+        self._enqueue = self.client.register_script(self.ENQUEUE_SCRIPT)
+        self._release = self.client.register_script(self.RELEASE_SCRIPT)
+
+    def enqueue_unprocessed(self, storage):
+        """Push ids of unprocessed articles that are not already queued or leased."""
+        pending, leases, queued = self.keys
+        added = 0
+        for batch in storage.iter_unprocessed_batches(1000):
+            added += self._enqueue(keys=[pending, queued], args=[article['id'] for article in batch])
+        if added:
+            logger.info(f"Queued {added} articles for analysis")
+        return added
+
+    def claim(self, worker_id, size=BATCH_SIZE):
+        now = time.time()
+        ids = self._claim(keys=self.keys[:2], args=[now, now + self.lease_seconds, size])
+        return Lease(worker_id, [int(article_id) for article_id in ids]) if ids else None
+
+    def ack(self, lease):
+        pending, leases, queued = self.keys
+        pipeline = self.client.pipeline()
+        pipeline.zrem(leases, *lease.article_ids)
+        pipeline.srem(queued, *lease.article_ids)
+        pipeline.execute()
+
+    def release(self, lease):
+        self._release(keys=self.keys[:2], args=lease.article_ids)
+
+
+WORK_QUEUES = {
+    'sqlite': SqliteWorkQueue,
+    'redis': RedisWorkQueue,
+}
+
+
+def get_work_queue(backend=WORK_QUEUE_BACKEND):
+    if backend not in WORK_QUEUES:
+        raise ValueError(f"Unknown work queue backend '{backend}'. Available: {', '.join(WORK_QUEUES)}")
+    return WORK_QUEUES[backend]()